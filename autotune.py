@@ -0,0 +1,175 @@
+# autotune.py
+from __future__ import annotations
+
+import glob
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Search space. Block size and C only matter with adaptive thresholding on.
+BLOCKS = (15, 25, 35, 51)
+CS = (4, 8, 12, 16)
+TEXT_HEIGHTS = (0, 24, 32)
+
+# Every process loads its own reader (about 1 GB with torch), so the default
+# stays well below the core count on big machines
+MAX_DEFAULT_JOBS = 4
+
+
+@dataclass
+class Trial:
+    params: Dict[str, object]
+    accuracy: float     # 1 - character error rate, averaged over samples
+    latency_ms: float   # mean OCR time per sample
+
+
+def load_samples(folder: str) -> List[Tuple[str, str]]:
+    """(image path, ground truth) pairs: every image with a sibling .txt file."""
+    out = []
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        stem, ext = os.path.splitext(path)
+        if ext.lower() not in IMAGE_EXTS or not os.path.exists(stem + ".txt"):
+            continue
+        with open(stem + ".txt", "r", encoding="utf-8") as f:
+            out.append((path, f.read()))
+    return out
+
+
+def search_space() -> List[Dict[str, object]]:
+    space = []
+    for blur, th in itertools.product((False, True), TEXT_HEIGHTS):
+        space.append(dict(adaptive=False, math_mode=blur, block=25, c=10, text_height=th))
+        for b, c in itertools.product(BLOCKS, CS):
+            space.append(dict(adaptive=True, math_mode=blur, block=b, c=c, text_height=th))
+    return space
+
+
+def _norm(s: str) -> str:
+    return " ".join(s.split()).lower()
+
+
+def _edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def accuracy(pred: str, truth: str) -> float:
+    p, t = _norm(pred), _norm(truth)
+    return max(0.0, 1.0 - _edit_distance(p, t) / max(1, len(t)))
+
+
+# ---------- worker processes ----------
+_SAMPLES: List[Tuple[object, str]] = []
+_LANG = "eng"
+
+
+def _init_worker(samples: Sequence[Tuple[str, str]], lang: str, torch_threads: int) -> None:
+    global _SAMPLES, _LANG
+    from PIL import Image
+    from inference_threads import apply_threads
+    import ocr
+
+    apply_threads(torch_threads, 1)
+    _LANG = lang
+    _SAMPLES = [(Image.open(p).convert("RGB"), truth) for p, truth in samples]
+    ocr._get_reader(lang)  # load once per worker, outside the timed region
+
+
+def _evaluate(params: Dict[str, object]) -> Trial:
+    from ocr import run_ocr
+    accs, times = [], []
+    for img, truth in _SAMPLES:
+        t0 = time.perf_counter()
+        text = run_ocr(img, lang=_LANG, ladder=False, **params)
+        times.append((time.perf_counter() - t0) * 1000)
+        accs.append(accuracy(text, truth))
+    return Trial(params, sum(accs) / len(accs), sum(times) / len(times))
+
+
+# ---------- search ----------
+def pareto_front(trials: Sequence[Trial]) -> List[Trial]:
+    """Trials no other trial beats on both accuracy and latency, fastest first."""
+    front: List[Trial] = []
+    best_acc = -1.0
+    for t in sorted(trials, key=lambda t: (t.latency_ms, -t.accuracy)):
+        if t.accuracy > best_acc:
+            front.append(t)
+            best_acc = t.accuracy
+    return front
+
+
+def pick(front: Sequence[Trial], tolerance: float = 0.005) -> Trial:
+    """Most accurate point, or the fastest one within `tolerance` of it."""
+    top = max(t.accuracy for t in front)
+    return min((t for t in front if t.accuracy >= top - tolerance), key=lambda t: t.latency_ms)
+
+
+def default_jobs() -> int:
+    return max(1, min(MAX_DEFAULT_JOBS, os.cpu_count() or 1))
+
+
+def run(samples: Sequence[Tuple[str, str]], lang: str = "eng", jobs: Optional[int] = None) -> List[Trial]:
+    jobs = jobs or default_jobs()
+    # One core per process; parallelism comes from the pool, not from torch
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(list(samples), lang, 1)) as ex:
+        return list(ex.map(_evaluate, search_space()))
+
+
+def report(trials: Sequence[Trial], chosen: Trial) -> str:
+    front = pareto_front(trials)
+    lines = [f"Evaluated {len(trials)} settings; Pareto front (fastest first):",
+             f"  {'':2}{'accuracy':>9} {'ms/frame':>9}  params"]
+    for t in front:
+        mark = "->" if t is chosen else ""
+        p = t.params
+        desc = (f"adaptive={p['adaptive']} block={p['block']} c={p['c']} "
+                f"blur={p['math_mode']} text_height={p['text_height']}")
+        lines.append(f"  {mark:2}{t.accuracy:9.3f} {t.latency_ms:9.1f}  {desc}")
+    return "\n".join(lines)
+
+
+def autotune_main(folder: str, jobs: Optional[int] = None) -> int:
+    from core import load_config_from_disk, save_config_to_disk
+
+    samples = load_samples(folder)
+    if not samples:
+        print(f"No samples in {folder!r} (need image files with matching .txt ground truth).")
+        return 1
+    cfg = load_config_from_disk()
+    print(f"Tuning on {len(samples)} samples, {len(search_space())} settings, "
+          f"{jobs or default_jobs()} processes...")
+    t0 = time.perf_counter()
+    trials = run(samples, cfg.ocr_lang, jobs)
+    chosen = pick(pareto_front(trials))
+    print(report(trials, chosen))
+    print(f"Search took {time.perf_counter() - t0:.1f} s")
+
+    p = chosen.params
+    cfg.ocr_adaptive = bool(p["adaptive"])
+    cfg.ocr_math_mode = bool(p["math_mode"])
+    cfg.ocr_block = int(p["block"])
+    cfg.ocr_c = int(p["c"])
+    cfg.ocr_text_height = int(p["text_height"])
+    save_config_to_disk(cfg)
+    print(f"Saved: adaptive={cfg.ocr_adaptive} block={cfg.ocr_block} c={cfg.ocr_c} "
+          f"math_mode={cfg.ocr_math_mode} text_height={cfg.ocr_text_height}")
+    if cfg.ocr_ladder:
+        print("Note: ocr_ladder is on; the tuned path is its first rung and lower-confidence "
+              "frames may still end up on another rung.")
+    return 0
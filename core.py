@@ -2,19 +2,29 @@
 from __future__ import annotations
 
 import logging
-import json, os
+import json, os, threading, time
 from dataclasses import asdict
-from dataclasses import dataclass
-from typing import Callable, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
 from PIL import ImageGrab, Image
-from ocr import run_ocr
-from overlay import RegionSelector, RegionOverlay
-from mini_math import solve_if_simple
+from ocr import run_ocr, run_ocr_detailed, OcrResult, preload_reader, release_if_idle, warm_import
+from mini_math import solve_if_simple, DEFAULT_ANSWER_PATTERN, FINAL_ANSWER_INSTRUCTION
+from inference_threads import apply_threads, autotune as autotune_threads
+from deadline import Deadline
+from router import DEFAULT_ROUTE_TABLE, DEFAULT_ROUTE_PRICES
+from metrics import counter, histogram
+
+if TYPE_CHECKING:
+    from overlay import RegionOverlay
 
 log = logging.getLogger(__name__)
 CONFIG_FILE = os.path.join(os.getcwd(), "config.json")
 
+_M_STAGE_MS = histogram("examgpt_stage_ms", "Wall time per pipeline stage", ("stage",))
+_M_RUNS = counter("examgpt_runs_total", "Capture -> answer runs by result", ("result",))
+_M_ANSWER_CACHE = counter("examgpt_answer_cache_lookups_total", "Fuzzy answer cache lookups", ("result",))
+
 
 def load_config_from_disk() -> Config:
     try:
@@ -38,6 +48,11 @@ class Config:
     # Region / overlay
     region: Optional[Tuple[int, int, int, int]] = None
     show_region_overlay: bool = False
+    region_snap: bool = False       # offer to shrink new selections to the detected text
+
+    # Console
+    console_max_lines: int = 2000   # older lines are trimmed from the top
+    console_fps: int = 20           # max console flushes per second
 
     # OCR
     ocr_engine: str = "easyocr"
@@ -46,19 +61,73 @@ class Config:
     ocr_adaptive: bool = True
     ocr_block: int = 25
     ocr_c: int = 10
+    ocr_trim: bool = True           # crop blank margins before detection
+    ocr_text_height: int = 32       # shrink text with taller capitals to ~this cap height (0 = off)
+    ocr_ladder: bool = False        # after the fixed path, climb LADDER while confidence is low
+    ocr_conf_threshold: float = 0.6
+
+    # Inference threads (0 = library default)
+    ocr_torch_threads: int = 0
+    ocr_cv_threads: int = 0
+    ocr_threads_autotune: bool = False
+
+    # Reader lifetime
+    ocr_idle_unload_s: int = 900    # release the model after this long unused (0 = never)
+    ocr_prewarm: bool = True        # reload in the background on region select / hover
+
+    # Out-of-process OCR (keeps EasyOCR/torch out of the GUI process)
+    ocr_out_of_process: bool = False
+    ocr_workers: int = 1
+
+    # Run history
+    history_enabled: bool = True
+    history_path: str = "history.sqlite3"
+    history_retention_days: int = 30
+    history_max_rows: int = 50_000
+
+    # Fuzzy answer cache: reuse the answer to a near-identical earlier question
+    answer_cache: bool = False
+    answer_cache_threshold: float = 0.95   # min similarity (1 - normalized edit distance)
+
+    # Metrics
+    metrics_port: int = 0                  # serve Prometheus text on 127.0.0.1:<port>/metrics (0 = off)
+    metrics_snapshot_path: str = "metrics.json"
+    metrics_snapshot_s: int = 0            # rewrite the snapshot file every N seconds (0 = off)
+
+    # Local OCR/answer service (start.py --serve)
+    service_port: int = 8765
+    service_batch_window_ms: int = 20
+    service_max_batch: int = 8
 
     # OpenAI
     openai_api_env: str = "OPENAI_API_KEY"
     model: str = "gpt-5"
     max_tokens: int = 256
     system_prompt: str = "You are a helpful assistant."
+    stream_early_stop: bool = False  # stream; hang up once a "Final answer: X" line has arrived
+    answer_stop_pattern: str = DEFAULT_ANSWER_PATTERN
+    answer_stop_instruction: str = FINAL_ANSWER_INSTRUCTION  # added to the system prompt while streaming
+
+    # End-to-end deadline per request (0 = none); results degrade instead of running late
+    deadline_s: float = 0.0
+    deadline_min_api_s: float = 1.0      # less than this left: answer locally, skip the API
+    deadline_cheap_below_s: float = 5.0  # less than this left: use fallback_model
+    fallback_model: str = "gpt-5-nano"
+
+    # Complexity routing: pick model / reasoning effort / token budget per question
+    routing_enabled: bool = False
+    route_table: list = field(default_factory=lambda: [dict(r) for r in DEFAULT_ROUTE_TABLE])
+    route_prices: dict = field(default_factory=lambda: dict(DEFAULT_ROUTE_PRICES))
+    route_stats_path: str = "route_stats.json"
 
 
 class ChatGPTClient:
     """
     Implemented in openai_client.py. Only here for type hints.
     """
-    def ask(self, system_prompt: str, user_text: str, max_tokens: int) -> str: ...
+    def ask(self, system_prompt: str, user_text: str, max_tokens: int,
+            stop_pattern: Optional[str] = None, model: Optional[str] = None,
+            timeout: float = 60, reasoning_effort: Optional[str] = None) -> str: ...
     def test_poem(self) -> str: ...
     def reconfigure(self, api_env: str, model: str, max_tokens: int) -> None: ...
     # no-op placeholders to keep type checkers happy
@@ -71,6 +140,14 @@ class App:
         self.ui_root = None
         self.write_home: Callable[[str], None] = lambda s: None
         self.overlay: Optional[RegionOverlay] = None
+        self._threads_applied: Optional[Tuple[int, int, bool]] = None
+        self._ocr_pool = None
+        self._run_history = None
+        self._router = None
+        self._answer_index = None
+        self._metrics_server = None
+        self._metrics_snapshot = None
+        self._action_lock = threading.Lock()
 
     def save_cfg(self):
         try:
@@ -86,10 +163,80 @@ class App:
     def set_ui(self, root, write_func):
         self.ui_root = root
         self.write_home = write_func
-        # Build overlay once; outline shows only if checkbox is on
+        # Build overlay once; outline shows only if checkbox is on. Imported
+        # here so headless users of App (the service) never load tkinter
+        from overlay import RegionOverlay
         self.overlay = RegionOverlay(root)
         if self.cfg.show_region_overlay and self.cfg.region:
             self.overlay.show(self.cfg.region)
+        root.after(30_000, self._idle_tick)
+
+    def _idle_tick(self):
+        try:
+            if self._ocr_pool is not None:
+                # Runs on the pool's maintenance thread; busy workers are skipped
+                self._ocr_pool.maintain(self.cfg.ocr_idle_unload_s)
+            else:
+                release_if_idle(self.cfg.ocr_idle_unload_s)
+        except Exception:
+            log.exception("Idle OCR release failed")
+        if self.ui_root:
+            self.ui_root.after(30_000, self._idle_tick)
+
+    def prewarm_ocr(self):
+        if not self.cfg.ocr_prewarm:
+            return
+        if self.cfg.ocr_out_of_process:
+            self._get_ocr_pool().preload(self.cfg.ocr_lang)
+        else:
+            preload_reader(self.cfg.ocr_lang)
+
+    def deferred_init(self):
+        """Non-critical startup work, run once the window is on screen."""
+        if self.client is None:
+            self.ensure_client()
+        if self.cfg.ocr_prewarm and not self.cfg.ocr_out_of_process:
+            warm_import()
+        if self.cfg.answer_cache:
+            self.answer_index()
+        self.start_metrics()
+
+    def start_metrics(self):
+        """Start the optional /metrics endpoint and snapshot file (once)."""
+        from metrics import SnapshotWriter, serve_metrics
+        try:
+            if self.cfg.metrics_port and self._metrics_server is None:
+                self._metrics_server = serve_metrics(self.cfg.metrics_port)
+            if self.cfg.metrics_snapshot_s > 0 and self.cfg.metrics_snapshot_path and self._metrics_snapshot is None:
+                self._metrics_snapshot = SnapshotWriter(self.cfg.metrics_snapshot_path, self.cfg.metrics_snapshot_s)
+        except Exception:
+            log.exception("Failed to start metrics export")
+
+    def _get_ocr_pool(self):
+        if self._ocr_pool is None or self._ocr_pool.size != max(1, self.cfg.ocr_workers):
+            from ocr_worker import OcrWorkerPool
+            if self._ocr_pool is not None:
+                self._ocr_pool.close()
+            self._ocr_pool = OcrWorkerPool(
+                self.cfg.ocr_workers,
+                torch_threads=self.cfg.ocr_torch_threads,
+                cv_threads=self.cfg.ocr_cv_threads,
+            )
+        return self._ocr_pool
+
+    def shutdown(self):
+        if self._ocr_pool is not None:
+            self._ocr_pool.close()
+            self._ocr_pool = None
+        if self._run_history is not None:
+            self._run_history.close()
+            self._run_history = None
+        if self._metrics_snapshot is not None:
+            self._metrics_snapshot.stop()
+            self._metrics_snapshot = None
+        if self._metrics_server is not None:
+            self._metrics_server.shutdown()
+            self._metrics_server = None
 
     # ---------- Region selection ----------
     def action_select_region(self) -> None:
@@ -106,8 +253,9 @@ class App:
             except Exception:
                 pass
 
+        from overlay import RegionSelector
         try:
-            selector = RegionSelector(self.ui_root)
+            selector = RegionSelector(self.ui_root, snap=self.cfg.region_snap)
             sel = selector.show()
         finally:
             # Restore existing outline if enabled
@@ -121,6 +269,7 @@ class App:
             self.cfg.region = sel
             l, t, w, h = sel
             self.write_home(f"[info] Region saved: left={l} top={t} width={w} height={h}\n")
+            self.prewarm_ocr()
             if self.cfg.show_region_overlay and self.overlay:
                 try:
                     self.overlay.update_region(sel)
@@ -155,52 +304,267 @@ class App:
             self.write_home(f"[error] Screen grab failed: {e}\n")
             return None
 
-    def action_ocr_only(self, writer: Optional[Callable[[str], None]] = None):
-        out = writer or self.write_home
-        out("[ocr]\n")
-        img = self._grab_region_image()
-        if not img:
-            return
-        text = run_ocr(
-            img,
+    def ocr_kwargs(self) -> dict:
+        return dict(
             engine=self.cfg.ocr_engine,
             lang=self.cfg.ocr_lang,
             math_mode=self.cfg.ocr_math_mode,
             adaptive=self.cfg.ocr_adaptive,
             block=self.cfg.ocr_block,
             c=self.cfg.ocr_c,
+            trim=self.cfg.ocr_trim,
+            text_height=self.cfg.ocr_text_height,
+            ladder=self.cfg.ocr_ladder,
+            conf_threshold=self.cfg.ocr_conf_threshold,
         )
-        out(text.strip() + "\n")
 
-        def action_send_to_chatgpt(self):
-            self.write_home("[info] Performing OCR and sending to ChatGPT...\n")
-            img = self._grab_region_image()
-            if not img:
-                return
-            text = run_ocr(
-                img,
-                engine=self.cfg.ocr_engine,
-                lang=self.cfg.ocr_lang,
-                math_mode=self.cfg.ocr_math_mode,
-                adaptive=self.cfg.ocr_adaptive,
-                block=self.cfg.ocr_block,
-                c=self.cfg.ocr_c,
+    def _run_ocr(self, img: Image.Image, deadline: Optional[Deadline] = None) -> OcrResult:
+        if self.cfg.ocr_out_of_process:
+            pool = self._get_ocr_pool()
+            key = (self.cfg.ocr_torch_threads, self.cfg.ocr_cv_threads, False)
+            if key != self._threads_applied:
+                # Autotune measures in-process only; workers just take the configured counts
+                pool.set_threads(self.cfg.ocr_torch_threads, self.cfg.ocr_cv_threads)
+                self._threads_applied = key
+            try:
+                return pool.run_detailed(img, deadline=deadline, **self.ocr_kwargs())
+            except TimeoutError:
+                if deadline is None or not deadline.enabled:
+                    raise
+                log.warning("OCR worker ran out of budget")
+                return OcrResult("", degraded=True, notes=["OCR timed out"])
+        self._ensure_threads(img)
+        return run_ocr_detailed(img, deadline=deadline, **self.ocr_kwargs())
+
+    def _ensure_threads(self, img: Image.Image) -> None:
+        # Re-applied whenever the thread settings change (e.g. from the OCR page)
+        key = (self.cfg.ocr_torch_threads, self.cfg.ocr_cv_threads, self.cfg.ocr_threads_autotune)
+        if key == self._threads_applied:
+            return
+        if self.cfg.ocr_threads_autotune and self.cfg.ocr_torch_threads <= 0:
+            self.write_home("[info] Autotuning OCR threads on this frame...\n")
+            kw = self.ocr_kwargs()
+            t, c, speedup = autotune_threads(lambda: run_ocr(img, **kw))
+            self.cfg.ocr_torch_threads, self.cfg.ocr_cv_threads = t, c
+            self.save_cfg()
+            self.write_home(f"[info] OCR threads: torch={t} cv2={c} ({speedup:.2f}x vs default)\n")
+        else:
+            t, c = apply_threads(self.cfg.ocr_torch_threads, self.cfg.ocr_cv_threads)
+            log.info("OCR threads: torch=%d cv2=%d", t, c)
+        self._threads_applied = (self.cfg.ocr_torch_threads, self.cfg.ocr_cv_threads, self.cfg.ocr_threads_autotune)
+
+    def run_history(self):
+        if self._run_history is None:
+            from history import RunHistory
+            self._run_history = RunHistory(
+                self.cfg.history_path,
+                retention_days=self.cfg.history_retention_days,
+                max_rows=self.cfg.history_max_rows,
             )
+        return self._run_history
 
-            text = text.strip()
-            if not text:
-                self.write_home("[error] OCR produced no text.\n")
-                return
+    def answer_index(self):
+        """FuzzyIndex of earlier answers; filled from history on a background thread."""
+        if self._answer_index is None:
+            from fuzzy import FuzzyIndex
+            self._answer_index = FuzzyIndex(threshold=self.cfg.answer_cache_threshold)
+            if self.cfg.history_enabled:
+                threading.Thread(target=self._fill_answer_index, name="answer-index", daemon=True).start()
+        return self._answer_index
+
+    def _fill_answer_index(self):
+        try:
+            t0 = time.perf_counter()
+            n = self._answer_index.extend(self.run_history().iter_answered())
+            log.info("Answer cache: %d history entries indexed in %.1f s", n, time.perf_counter() - t0)
+        except Exception:
+            log.exception("Failed to build answer cache from history")
+
+    def lookup_answer(self, text: str):
+        """Earlier answer for a near-duplicate of `text` (fuzzy.Match), or None."""
+        if not self.cfg.answer_cache:
+            return None
+        try:
+            hit = self.answer_index().lookup(text, self.cfg.answer_cache_threshold)
+        except Exception:
+            log.exception("Answer cache lookup failed")
+            return None
+        _M_ANSWER_CACHE.labels("miss" if hit is None else "hit").inc()
+        return hit
+
+    def remember_answer(self, text: str, answer: str) -> None:
+        if self.cfg.answer_cache and text and answer:
+            self.answer_index().add(text, answer)
+
+    def router(self):
+        if self._router is None:
+            from router import Router
+            self._router = Router(self.cfg.route_table, self.cfg.route_prices, self.cfg.route_stats_path,
+                                  default_model=self.cfg.model, default_max_tokens=self.cfg.max_tokens)
+        return self._router
+
+    def _record_run(self, ocr_text: str, answer: str, timings: dict, cache: Optional[str] = None,
+                    quality: str = "exact", ocr: Optional[OcrResult] = None,
+                    meta: Optional[dict] = None) -> None:
+        for k, v in timings.items():
+            if k.endswith("_ms"):
+                _M_STAGE_MS.labels(k[:-3]).observe(v)
+        if not self.cfg.history_enabled:
+            return
+        settings = self.ocr_kwargs() | {"model": self.cfg.model, "result": quality}
+        if ocr is not None and ocr.variant:
+            settings |= {"ocr_variant": ocr.variant, "ocr_conf": round(ocr.mean_conf, 3)}
+        if meta:
+            settings |= meta
+        try:
+            self.run_history().append(
+                region=self.cfg.region,
+                settings=settings,
+                ocr_text=ocr_text,
+                answer=answer,
+                timings=timings,
+                cache=cache,
+            )
+        except Exception:
+            log.exception("Failed to record run history")
+
+    @staticmethod
+    def _quality(notes: List[str]) -> str:
+        return "degraded: " + "; ".join(notes) if notes else "exact"
+
+    def run_in_background(self, action: Callable[[Callable[[str], None]], None],
+                          writer: Optional[Callable[[str], None]] = None) -> None:
+        """Run an OCR/answer action off the Tk thread, one at a time; output goes to `writer`."""
+        out = writer or self.write_home
+        if not self._action_lock.acquire(blocking=False):
+            out("[warn] Still working on the previous request.\n")
+            return
+
+        def run():
             try:
-                # Make sure a client exists (in case the GUI hasn’t hit “Apply Settings” yet)
-                if self.client is None:
-                    from openai_client import ChatGPTClient  # respect your existing design
-                    self.client = ChatGPTClient(self.cfg.openai_api_env, self.cfg.model, self.cfg.max_tokens)
-                answer = self.client.ask(self.cfg.system_prompt, text, self.cfg.max_tokens)
-                if not answer.strip():
-                    self.write_home("[error] Model returned empty text.\n")
-                else:
-                    self.write_home("[answer]\n" + answer.strip() + "\n")
+                action(out)
             except Exception as e:
-                log.exception("OpenAI error")
-                self.write_home(f"[error] {e}\n")
+                log.exception("Action failed")
+                out(f"[error] {e}\n")
+            finally:
+                self._action_lock.release()
+
+        threading.Thread(target=run, name="examgpt-action", daemon=True).start()
+
+    def action_ocr_only(self, writer: Optional[Callable[[str], None]] = None):
+        out = writer or self.write_home
+        out("[ocr]\n")
+        dl = Deadline(self.cfg.deadline_s)
+        t0 = time.perf_counter()
+        img = self._grab_region_image()
+        if not img:
+            return
+        t1 = time.perf_counter()
+        res = self._run_ocr(img, dl)
+        t2 = time.perf_counter()
+        out(res.text.strip() + "\n")
+        if res.variant:
+            out(f"[info] confidence {res.mean_conf:.2f} ({res.variant})\n")
+        if res.degraded:
+            out(f"[warn] ({self._quality(res.notes)})\n")
+        self._record_run(res.text.strip(), "", {"capture_ms": (t1 - t0) * 1000, "ocr_ms": (t2 - t1) * 1000},
+                         quality=self._quality(res.notes if res.degraded else []), ocr=res)
+
+    def _local_answer(self, text: str, notes: List[str]) -> str:
+        ok, val = solve_if_simple(text)
+        if ok:
+            notes.append("local math")
+            return val
+        notes.append("no local answer")
+        return ""
+
+    def _ask_within(self, text: str, dl: Deadline, timings: dict, notes: List[str], meta: dict) -> str:
+        """Ask the model with whatever budget is left; degrade when it runs out."""
+        if dl.enabled and dl.remaining() < self.cfg.deadline_min_api_s:
+            notes.append("no time left for the API")
+            return self._local_answer(text, notes)
+
+        model, effort, max_tokens, route = self.cfg.model, None, self.cfg.max_tokens, None
+        if self.cfg.routing_enabled:
+            route = self.router().route(text)
+            model, effort, max_tokens = route.model, route.reasoning_effort, route.max_tokens
+            meta.update(tier=route.tier, reasoning_effort=effort)
+        if dl.enabled and self.cfg.fallback_model and dl.remaining() < self.cfg.deadline_cheap_below_s:
+            model = self.cfg.fallback_model
+            notes.append(f"cheaper model {model}")
+        meta["model"] = model
+
+        # Make sure a client exists (in case the GUI hasn’t hit “Apply Settings” yet)
+        self.ensure_client()
+        stop = self.cfg.answer_stop_pattern if self.cfg.stream_early_stop else None
+        system = self.cfg.system_prompt
+        if stop and self.cfg.answer_stop_instruction:
+            # The stream can only stop early if the reply ends in the watched form
+            system = f"{system}\n\n{self.cfg.answer_stop_instruction}"
+        t0 = time.perf_counter()
+        try:
+            answer = self.client.ask(system, text, max_tokens,
+                                     stop_pattern=stop, model=model, timeout=dl.timeout(60),
+                                     reasoning_effort=effort).strip()
+        except Exception as e:
+            import requests  # already loaded by the client; kept off the startup path
+            if dl.enabled and (dl.expired() or isinstance(e, (requests.Timeout, TimeoutError))):
+                log.warning("API call ran out of budget: %s", e)
+                notes.append("API timed out")
+                return self._local_answer(text, notes)
+            raise
+        if route is not None:
+            self.router().record(route, model, (time.perf_counter() - t0) * 1000,
+                                 getattr(self.client, "last_usage", None))
+        stats = getattr(self.client, "last_stats", None) or {}
+        for k in ("saved_ms_est", "saved_tokens_est"):
+            if stop and stats.get(k) is not None:
+                timings[k] = stats[k]
+        return answer
+
+    def action_send_to_chatgpt(self, writer: Optional[Callable[[str], None]] = None):
+        out = writer or self.write_home
+        out("[info] Performing OCR and sending to ChatGPT...\n")
+        dl = Deadline(self.cfg.deadline_s)
+        t0 = time.perf_counter()
+        img = self._grab_region_image()
+        if not img:
+            return
+        t1 = time.perf_counter()
+        res = self._run_ocr(img, dl)
+        t2 = time.perf_counter()
+        timings = {"capture_ms": (t1 - t0) * 1000, "ocr_ms": (t2 - t1) * 1000}
+        notes: List[str] = list(res.notes) if res.degraded else []
+        meta: dict = {}
+
+        text = res.text.strip()
+        if text and res.mean_conf < self.cfg.ocr_conf_threshold:
+            out(f"[warn] Low OCR confidence {res.mean_conf:.2f}; answer may be off.\n")
+        if not text:
+            out("[error] OCR produced no text.\n" if not notes else f"[error] OCR produced no text ({self._quality(notes)}).\n")
+            self._record_run("", "", timings, quality=self._quality(notes), ocr=res)
+            _M_RUNS.labels("no_text").inc()
+            return
+        answer, cache, result = "", None, "error"
+        try:
+            hit = self.lookup_answer(text)
+            if hit is not None:
+                answer, cache = hit.answer, f"fuzzy:{hit.score:.2f}"
+                out(f"[answer] (cached, similarity {hit.score:.2f})\n" + answer + "\n")
+                result = "cached"
+                return
+            answer = self._ask_within(text, dl, timings, notes, meta)
+            if not answer:
+                out("[error] Model returned empty text.\n" if not notes else f"[error] No answer ({self._quality(notes)}).\n")
+            else:
+                out(f"[answer] ({self._quality(notes)})\n" + answer + "\n")
+                result = "degraded" if notes else "exact"
+                if not notes:
+                    self.remember_answer(text, answer)
+        except Exception as e:
+            log.exception("OpenAI error")
+            out(f"[error] {e}\n")
+        finally:
+            timings["api_ms"] = (time.perf_counter() - t2) * 1000
+            _M_RUNS.labels(result).inc()
+            self._record_run(text, answer, timings, cache=cache, quality=self._quality(notes), ocr=res, meta=meta)
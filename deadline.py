@@ -0,0 +1,32 @@
+# deadline.py
+from __future__ import annotations
+
+import math
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    End-to-end time budget for one capture -> OCR -> answer request. Each stage
+    asks for what is left instead of using its own fixed timeout.
+    """
+    def __init__(self, budget_s: Optional[float] = None):
+        self.budget_s = budget_s if budget_s and budget_s > 0 else None
+        self.end = time.monotonic() + self.budget_s if self.budget_s else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.end is not None
+
+    def remaining(self) -> float:
+        if self.end is None:
+            return math.inf
+        return max(0.0, self.end - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: float) -> float:
+        """`cap` clipped to the remaining budget (for requests' timeout=)."""
+        return min(cap, self.remaining())
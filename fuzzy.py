@@ -0,0 +1,281 @@
+# fuzzy.py
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_lev  # optional, C implementation
+except Exception:
+    _rf_lev = None
+
+log = logging.getLogger(__name__)
+
+_P = np.uint64((1 << 31) - 1)   # Mersenne prime for the MinHash permutations
+_MIX = np.uint64(1_000_003)
+
+# Characters OCR swaps for each other; folded to one spelling before hashing
+_CONFUSABLES = str.maketrans({"o": "0", "l": "1", "i": "1", "|": "1", "!": "1",
+                              "‘": "'", "’": "'", "“": '"', "”": '"',
+                              "–": "-", "—": "-"})
+_WS_RE = re.compile(r"\s+")
+_NUM_RE = re.compile(r"\d+")
+# Words that flip what a question asks for while barely changing its spelling
+_POLARITY_RE = re.compile(
+    r"\b(?:not|no|never|none|nor|except|true|false|least|most|fewest|greatest|"
+    r"correct|incorrect|always|sometimes)\b|n['’]t\b"
+)
+
+
+def normalize(text: str) -> str:
+    """Case-, whitespace- and confusable-insensitive form used for matching."""
+    return _WS_RE.sub(" ", text.casefold()).strip().translate(_CONFUSABLES)
+
+
+def _numbers(text: str) -> List[str]:
+    # Taken before confusable folding, so "O" read for "0" never invents a number
+    return _NUM_RE.findall(text)
+
+
+def _polarity(text: str) -> List[str]:
+    return _POLARITY_RE.findall(text.casefold())
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Binary search on slice equality: the comparisons run in C
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def levenshtein(a: str, b: str, max_dist: Optional[int] = None) -> int:
+    """
+    Edit distance; rapidfuzz if installed, else Myers' bit-parallel algorithm on
+    what is left after stripping the common prefix and suffix. With `max_dist`,
+    anything farther apart may return early with max_dist + 1.
+    """
+    if _rf_lev is not None:
+        return int(_rf_lev.distance(a, b, score_cutoff=max_dist))
+    p = _common_prefix(a, b)
+    a, b = a[p:], b[p:]
+    q = _common_prefix(a[::-1], b[::-1])
+    if q:
+        a, b = a[:-q], b[:-q]
+    if len(a) < len(b):
+        a, b = b, a
+    m, n = len(b), len(a)
+    if max_dist is not None and n - m > max_dist:
+        return max_dist + 1
+    if m == 0:
+        return n
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    for j, ch in enumerate(a, 1):
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+            # Each remaining character can lower the score by at most one
+            if max_dist is not None and score - (n - j) > max_dist:
+                return max_dist + 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return score
+
+
+def similarity(a: str, b: str, min_score: float = 0.0) -> float:
+    """1 - normalized edit distance; may return 0.0 for anything below `min_score`."""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    cutoff = int((1.0 - min_score) * longest) if min_score > 0 else None
+    d = levenshtein(a, b, cutoff)
+    if cutoff is not None and d > cutoff:
+        return 0.0
+    return 1.0 - d / longest
+
+
+@dataclass
+class Match:
+    id: int
+    text: str       # stored prompt as it was added
+    answer: str
+    score: float    # similarity of the normalized prompts, 0..1
+
+
+class FuzzyIndex:
+    """
+    Near-duplicate lookup for OCR'd prompts. Each prompt is reduced to MinHash
+    signatures over character `ngram` shingles and split into `bands` LSH keys;
+    prompts sharing a key are candidates, verified with edit distance on the
+    normalized text. Band keys live in sorted numpy arrays (searchsorted per band)
+    plus a small unsorted tail for recent additions, so lookups stay well under a
+    millisecond at 100k entries without a Python dict entry per band per prompt.
+    """
+    def __init__(self, threshold: float = 0.95, num_perm: int = 32, bands: int = 8, ngram: int = 3,
+                 max_candidates: int = 8, numbers_must_match: bool = True,
+                 polarity_must_match: bool = True, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.max_candidates = max_candidates
+        self.numbers_must_match = numbers_must_match
+        self.polarity_must_match = polarity_must_match
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_P), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_P), size=(num_perm, 1), dtype=np.uint64)
+        self._fold = rng.integers(1, 1 << 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._texts: List[str] = []       # original text
+        self._norms: List[str] = []       # normalized text
+        self._answers: List[str] = []
+        self._exact: Dict[str, int] = {}  # normalized text -> id
+        self._keys = np.empty((0, self.bands), dtype=np.uint64)
+        self._n = 0
+        self._indexed = 0                 # rows covered by the sorted arrays
+        self._sorted: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ---------- hashing ----------
+    def _band_keys(self, norm: str) -> np.ndarray:
+        cps = np.frombuffer(norm.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        k = self.ngram
+        if cps.size >= k:
+            g = cps[: cps.size - k + 1].copy()
+            for j in range(1, k):
+                g = g * _MIX + cps[j: cps.size - k + 1 + j]
+        else:
+            g = np.array([int(cps.sum()) if cps.size else 0], dtype=np.uint64)
+        g = np.unique(g % _P)
+        sig = ((self._a * g + self._b) % _P).min(axis=1)
+        return (sig.reshape(self.bands, self.rows) * self._fold).sum(axis=1)
+
+    # ---------- building ----------
+    def add(self, text: str, answer: str) -> int:
+        """Store a prompt and its answer; a repeat of a stored prompt replaces its answer."""
+        norm = normalize(text)
+        with self._lock:
+            rid = self._exact.get(norm)
+            if rid is not None:
+                self._texts[rid], self._answers[rid] = text, answer
+                return rid
+            keys = self._band_keys(norm)
+            if self._n == self._keys.shape[0]:
+                grown = np.empty((max(1024, 2 * self._n), self.bands), dtype=np.uint64)
+                grown[: self._n] = self._keys[: self._n]
+                self._keys = grown
+            rid = self._n
+            self._keys[rid] = keys
+            self._texts.append(text)
+            self._norms.append(norm)
+            self._answers.append(answer)
+            self._exact[norm] = rid
+            self._n += 1
+            if self._n - self._indexed > max(1024, self._indexed // 8):
+                self._reindex()
+            return rid
+
+    def extend(self, items: Iterable[Tuple[str, str]]) -> int:
+        added = 0
+        for text, answer in items:
+            if text and answer:
+                self.add(text, answer)
+                added += 1
+        with self._lock:
+            self._reindex()
+        return added
+
+    def _reindex(self) -> None:
+        keys = self._keys[: self._n]
+        self._sorted = []
+        for j in range(self.bands):
+            order = np.argsort(keys[:, j], kind="stable").astype(np.int64)
+            self._sorted.append((keys[order, j], order))
+        self._indexed = self._n
+
+    # ---------- lookup ----------
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        hits = []
+        for j, (col, order) in enumerate(self._sorted):
+            lo = np.searchsorted(col, keys[j], side="left")
+            hi = np.searchsorted(col, keys[j], side="right")
+            if hi > lo:
+                hits.append(order[lo:hi])
+        if self._n > self._indexed:
+            tail = self._keys[self._indexed: self._n]
+            rows = np.flatnonzero((tail == keys).any(axis=1))
+            if rows.size:
+                hits.append(rows + self._indexed)
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+        ids, counts = np.unique(np.concatenate(hits), return_counts=True)
+        # Most shared bands first: the best estimate of shingle overlap
+        return ids[np.argsort(-counts, kind="stable")][: self.max_candidates]
+
+    def _same_meaning(self, text: str, other: str) -> bool:
+        """
+        Guards edit distance can't provide: the numbers and the negation/polarity
+        words (not, except, true/false, least/most, ...) must be identical, in order.
+        """
+        if self.numbers_must_match and _numbers(text) != _numbers(other):
+            return False
+        if self.polarity_must_match and _polarity(text) != _polarity(other):
+            return False
+        return True
+
+    def lookup(self, text: str, threshold: Optional[float] = None) -> Optional[Match]:
+        """Best stored prompt with similarity >= threshold, or None."""
+        threshold = self.threshold if threshold is None else threshold
+        norm = normalize(text)
+        with self._lock:
+            if not self._n:
+                return None
+            rid = self._exact.get(norm)
+            if rid is not None and self._same_meaning(text, self._texts[rid]):
+                return Match(rid, self._texts[rid], self._answers[rid], 1.0)
+            best: Optional[Match] = None
+            for rid in self._candidates(self._band_keys(norm)).tolist():
+                other = self._norms[rid]
+                # Length alone bounds the similarity; skip the edit distance when it can't pass
+                if 1.0 - abs(len(other) - len(norm)) / max(1, len(other), len(norm)) < threshold:
+                    continue
+                if not self._same_meaning(text, self._texts[rid]):
+                    continue
+                score = similarity(norm, other, threshold)
+                if score >= threshold and (best is None or score > best.score):
+                    best = Match(rid, self._texts[rid], self._answers[rid], score)
+            return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
@@ -1,12 +1,18 @@
 # gui.py
 from __future__ import annotations
 
+import json
+import logging
 import re
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk
+from typing import Callable, Optional
 
 from core import Config, App
-from openai_client import ChatGPTClient
+
+log = logging.getLogger(__name__)
 
 
 # =======================
@@ -41,20 +47,76 @@ THEME = {
 # ----- colored console writer -----
 _TAG_RE = re.compile(r"\[(ready|info|answer|ocr|error|warn)\]")
 
-def console_write(widget: tk.Text, text: str):
-    widget.config(state="normal")
+def _tagged(text: str) -> list:
+    """Text.insert() arguments: alternating chunks and tags for each [tag] marker."""
+    args = []
     pos = 0
-    while True:
-        m = _TAG_RE.search(text, pos)
-        if not m:
-            widget.insert("end", text[pos:])
-            break
-        widget.insert("end", text[pos:m.start()])
-        tag = m.group(1)
-        widget.insert("end", m.group(0), f"tag_{tag}")
+    for m in _TAG_RE.finditer(text):
+        if m.start() > pos:
+            args += [text[pos:m.start()], ()]
+        args += [m.group(0), f"tag_{m.group(1)}"]
         pos = m.end()
-    widget.see("end")
-    widget.config(state="disabled")
+    if pos < len(text):
+        args += [text[pos:], ()]
+    return args
+
+
+class ConsoleWriter:
+    """
+    Thread-safe, batched console output. write() only appends to a buffer; a
+    root.after tick (at most `fps` times a second) flushes everything pending
+    in one insert and trims the widget to its last `max_lines` lines.
+    """
+    def __init__(self, root: tk.Misc, widget: tk.Text, max_lines: int = 2000, fps: int = 20):
+        self.root = root
+        self.widget = widget
+        self.max_lines = max(0, int(max_lines))
+        self.interval_ms = max(1, 1000 // max(1, int(fps)))
+        self._lock = threading.Lock()
+        self._pending: list = []
+        self._tick()
+
+    def write(self, text: str) -> None:
+        if text:
+            with self._lock:
+                self._pending.append(text)
+
+    __call__ = write
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+        self.widget.config(state="normal")
+        self.widget.delete("1.0", "end")
+        self.widget.config(state="disabled")
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            text = "".join(self._pending)
+            self._pending.clear()
+        if self.max_lines and text.count("\n") > self.max_lines:
+            # Backlog alone overflows the widget: only the tail would survive the trim
+            text = "\n".join(text.split("\n")[-(self.max_lines + 1):])
+        w = self.widget
+        w.config(state="normal")
+        w.insert("end", *_tagged(text))
+        if self.max_lines:
+            lines = int(w.index("end-1c").split(".")[0])
+            if lines > self.max_lines:
+                w.delete("1.0", f"{lines - self.max_lines + 1}.0")
+        w.see("end")
+        w.config(state="disabled")
+
+    def _tick(self) -> None:
+        try:
+            self.flush()
+        except tk.TclError:
+            return  # widget destroyed
+        except Exception as e:
+            log.warning("console flush failed: %s", e)
+        self.root.after(self.interval_ms, self._tick)
 
 
 def _format_region(r):
@@ -64,7 +126,8 @@ def _format_region(r):
     return f"{l},{t},{w},{h}"
 
 
-def gui_main(app: App, cfg: Config, log_path: str):
+def gui_main(app: App, cfg: Config, log_path: str,
+             on_first_paint: Optional[Callable[[], None]] = None):
     root = tk.Tk()
     root.title("Screen OCR Box → ChatGPT")
     root.geometry("1060x640+200+120")
@@ -166,11 +229,19 @@ def gui_main(app: App, cfg: Config, log_path: str):
     main.pack(side="right", fill="both", expand=True)
 
     pages = {}
+    on_show = {}
 
     def show(name: str):
+        # Non-home pages are built on first navigation
+        if name not in pages:
+            t0 = time.perf_counter()
+            pages[name] = builders[name]()
+            log.debug("Built %s page in %.1f ms", name, (time.perf_counter() - t0) * 1000)
         for n, f in pages.items():
             f.pack_forget()
         pages[name].pack(fill="both", expand=True)
+        if name in on_show:
+            on_show[name]()
 
     # ------------- Home -------------
     home = ttk.Frame(main, style="Dark.TFrame")
@@ -194,17 +265,31 @@ def gui_main(app: App, cfg: Config, log_path: str):
         style="Dark.TCheckbutton"
     ).pack(side="right", padx=10, pady=10)
 
+    snap_var = tk.BooleanVar(value=bool(cfg.region_snap))
+    ttk.Checkbutton(
+        topbar,
+        text="Snap selection to text",
+        variable=snap_var,
+        style="Dark.TCheckbutton",
+        command=lambda: setattr(cfg, "region_snap", bool(snap_var.get())),
+    ).pack(side="right", padx=10, pady=10)
+
     # Action row
     row = ttk.Frame(home, style="Card.TFrame")
     row.pack(fill="x", pady=(10, 8))
     ttk.Button(row, text="Select New Region", style="Dark.TButton",
                command=lambda: _select_region_update()).pack(side="left")
-    ttk.Button(row, text="Preview OCR", style="Dark.TButton",
-               command=lambda: app.action_ocr_only(lambda s: console_write(home_out, s))).pack(side="left", padx=(8, 0))
-    ttk.Button(row, text="Ask ChatGPT", style="Accent.TButton",
-               command=lambda: app.action_send_to_chatgpt(lambda s: console_write(home_out, s))).pack(side="left", padx=(8, 0))
+    preview_btn = ttk.Button(row, text="Preview OCR", style="Dark.TButton",
+               command=lambda: app.run_in_background(app.action_ocr_only, home_console))
+    preview_btn.pack(side="left", padx=(8, 0))
+    ask_btn = ttk.Button(row, text="Ask ChatGPT", style="Accent.TButton",
+               command=lambda: app.run_in_background(app.action_send_to_chatgpt, home_console))
+    ask_btn.pack(side="left", padx=(8, 0))
+    # Hovering an OCR action reloads the reader if it was released while idle
+    for b in (preview_btn, ask_btn):
+        b.bind("<Enter>", lambda e: app.prewarm_ocr(), add="+")
     ttk.Button(row, text="Clear", style="Dark.TButton",
-               command=lambda: _clear_text(home_out)).pack(side="left", padx=(8, 0))
+               command=lambda: home_console.clear()).pack(side="left", padx=(8, 0))
 
     # Console (with colored tags)
     home_out = tk.Text(home, height=16, bg=THEME["surface"], fg=THEME["fg"],
@@ -220,142 +305,291 @@ def gui_main(app: App, cfg: Config, log_path: str):
     home_out.tag_config("tag_error", foreground="#ff6b6b")    # red
     home_out.tag_config("tag_warn",  foreground="#ffcc66")    # amber
 
-    console_write(home_out, "[ready]\n")
+    # Output from worker threads and streamed answers is batched onto the UI thread
+    home_console = ConsoleWriter(root, home_out, cfg.console_max_lines, cfg.console_fps)
+    home_console.write("[ready]\n")
 
     pages["home"] = home
 
     # ------------- OCR -------------
-    ocrp = ttk.Frame(main, style="Dark.TFrame")
-    ttk.Label(ocrp, text="OCR", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
-
-    r1 = ttk.Frame(ocrp, style="Card.TFrame"); r1.pack(anchor="w", pady=6, fill="x")
-    ttk.Label(r1, text="Engine:", style="Card.TLabel").pack(side="left", padx=(10, 6), pady=8)
-    eng = tk.StringVar(value=cfg.ocr_engine)
-    ttk.Combobox(r1, textvariable=eng, values=["auto", "easyocr", "tesseract"], state="readonly",
-                 style="Dark.TCombobox", width=12).pack(side="left")
-
-    ttk.Label(r1, text="Language:", style="Card.TLabel").pack(side="left", padx=(12, 6))
-    lng = tk.StringVar(value=cfg.ocr_lang)
-    ttk.Entry(r1, textvariable=lng, width=10, style="Dark.TEntry").pack(side="left")
-
-    # Options row
-    r2 = ttk.Frame(ocrp, style="Card.TFrame"); r2.pack(anchor="w", pady=6, fill="x")
-    adaptive = tk.BooleanVar(value=True)  # default ON per your request
-    ttk.Checkbutton(r2, text="Adaptive Threshold", variable=adaptive, style="Dark.TCheckbutton").pack(side="left", padx=(10, 10), pady=8)
-    math_mode = tk.BooleanVar(value=cfg.ocr_math_mode)
-    ttk.Checkbutton(r2, text="Math mode (gridline removal)", variable=math_mode, style="Dark.TCheckbutton").pack(side="left", padx=(0, 10), pady=8)
-
-    # Params
-    r3 = ttk.Frame(ocrp, style="Card.TFrame"); r3.pack(anchor="w", pady=6, fill="x")
-    blk = tk.IntVar(value=cfg.ocr_block)
-    cc = tk.IntVar(value=cfg.ocr_c)
-    ttk.Label(r3, text="Block:", style="Card.TLabel").pack(side="left", padx=(10, 6))
-    ttk.Entry(r3, textvariable=blk, width=6, style="Dark.TEntry").pack(side="left")
-    ttk.Label(r3, text="C:", style="Card.TLabel").pack(side="left", padx=(12, 6))
-    ttk.Entry(r3, textvariable=cc, width=6, style="Dark.TEntry").pack(side="left")
-
-    # OCR output + buttons
-    ocr_out = tk.Text(ocrp, height=12, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
-    ocr_out.pack(fill="both", expand=True, pady=(8, 0))
-
-    def _save_ocr_cfg():
-        cfg.ocr_engine = eng.get().strip() or "auto"
-        cfg.ocr_lang = lng.get().strip() or "eng"
-        cfg.ocr_adaptive = bool(adaptive.get())
-        cfg.ocr_math_mode = bool(math_mode.get())
-        try:
-            cfg.ocr_block = int(blk.get())
-            cfg.ocr_c = int(cc.get())
-        except Exception:
-            pass
-
-    def _ocr_preview():
-        _save_ocr_cfg()
-        app.action_ocr_only(lambda s: console_write(ocr_out, s))
-
-    rbtn = ttk.Frame(ocrp, style="Card.TFrame"); rbtn.pack(anchor="w", pady=8)
-    ttk.Button(rbtn, text="Save OCR Settings", style="Dark.TButton", command=_save_ocr_cfg).pack(side="left", padx=(0, 8))
-    ttk.Button(rbtn, text="Preview OCR (from region)", style="Dark.TButton", command=_ocr_preview).pack(side="left")
-
-    pages["ocr"] = ocrp
+    def _build_ocr():
+        ocrp = ttk.Frame(main, style="Dark.TFrame")
+        ttk.Label(ocrp, text="OCR", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
+
+        r1 = ttk.Frame(ocrp, style="Card.TFrame"); r1.pack(anchor="w", pady=6, fill="x")
+        ttk.Label(r1, text="Engine:", style="Card.TLabel").pack(side="left", padx=(10, 6), pady=8)
+        eng = tk.StringVar(value=cfg.ocr_engine)
+        ttk.Combobox(r1, textvariable=eng, values=["auto", "easyocr", "tesseract"], state="readonly",
+                     style="Dark.TCombobox", width=12).pack(side="left")
+
+        ttk.Label(r1, text="Language:", style="Card.TLabel").pack(side="left", padx=(12, 6))
+        lng = tk.StringVar(value=cfg.ocr_lang)
+        ttk.Entry(r1, textvariable=lng, width=10, style="Dark.TEntry").pack(side="left")
+
+        # Options row
+        r2 = ttk.Frame(ocrp, style="Card.TFrame"); r2.pack(anchor="w", pady=6, fill="x")
+        adaptive = tk.BooleanVar(value=cfg.ocr_adaptive)
+        ttk.Checkbutton(r2, text="Adaptive Threshold", variable=adaptive, style="Dark.TCheckbutton").pack(side="left", padx=(10, 10), pady=8)
+        math_mode = tk.BooleanVar(value=cfg.ocr_math_mode)
+        ttk.Checkbutton(r2, text="Math mode (gridline removal)", variable=math_mode, style="Dark.TCheckbutton").pack(side="left", padx=(0, 10), pady=8)
+        ladder = tk.BooleanVar(value=cfg.ocr_ladder)
+        ttk.Checkbutton(r2, text="Retry ladder below confidence", variable=ladder, style="Dark.TCheckbutton").pack(side="left", padx=(0, 6), pady=8)
+        conf_thr = tk.DoubleVar(value=cfg.ocr_conf_threshold)
+        ttk.Entry(r2, textvariable=conf_thr, width=6, style="Dark.TEntry").pack(side="left")
+
+        # Params
+        r3 = ttk.Frame(ocrp, style="Card.TFrame"); r3.pack(anchor="w", pady=6, fill="x")
+        blk = tk.IntVar(value=cfg.ocr_block)
+        cc = tk.IntVar(value=cfg.ocr_c)
+        ttk.Label(r3, text="Block:", style="Card.TLabel").pack(side="left", padx=(10, 6))
+        ttk.Entry(r3, textvariable=blk, width=6, style="Dark.TEntry").pack(side="left")
+        ttk.Label(r3, text="C:", style="Card.TLabel").pack(side="left", padx=(12, 6))
+        ttk.Entry(r3, textvariable=cc, width=6, style="Dark.TEntry").pack(side="left")
+
+        # Inference threads (0 = library default)
+        r4 = ttk.Frame(ocrp, style="Card.TFrame"); r4.pack(anchor="w", pady=6, fill="x")
+        torch_thr = tk.IntVar(value=cfg.ocr_torch_threads)
+        cv_thr = tk.IntVar(value=cfg.ocr_cv_threads)
+        thr_auto = tk.BooleanVar(value=cfg.ocr_threads_autotune)
+        ttk.Label(r4, text="Torch threads:", style="Card.TLabel").pack(side="left", padx=(10, 6))
+        ttk.Entry(r4, textvariable=torch_thr, width=6, style="Dark.TEntry").pack(side="left")
+        ttk.Label(r4, text="OpenCV threads:", style="Card.TLabel").pack(side="left", padx=(12, 6))
+        ttk.Entry(r4, textvariable=cv_thr, width=6, style="Dark.TEntry").pack(side="left")
+        ttk.Checkbutton(r4, text="Autotune on next capture", variable=thr_auto, style="Dark.TCheckbutton").pack(side="left", padx=(12, 10), pady=8)
+
+        r5 = ttk.Frame(ocrp, style="Card.TFrame"); r5.pack(anchor="w", pady=6, fill="x")
+        oop = tk.BooleanVar(value=cfg.ocr_out_of_process)
+        workers = tk.IntVar(value=cfg.ocr_workers)
+        ttk.Checkbutton(r5, text="Run OCR in worker process", variable=oop, style="Dark.TCheckbutton").pack(side="left", padx=(10, 10), pady=8)
+        ttk.Label(r5, text="Workers:", style="Card.TLabel").pack(side="left", padx=(0, 6))
+        ttk.Entry(r5, textvariable=workers, width=6, style="Dark.TEntry").pack(side="left")
+
+        # OCR output + buttons
+        ocr_out = tk.Text(ocrp, height=12, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
+        ocr_out.pack(fill="both", expand=True, pady=(8, 0))
+        ocr_console = ConsoleWriter(root, ocr_out, cfg.console_max_lines, cfg.console_fps)
+
+        def _save_ocr_cfg():
+            cfg.ocr_engine = eng.get().strip() or "auto"
+            cfg.ocr_lang = lng.get().strip() or "eng"
+            cfg.ocr_adaptive = bool(adaptive.get())
+            cfg.ocr_math_mode = bool(math_mode.get())
+            cfg.ocr_ladder = bool(ladder.get())
+            try:
+                cfg.ocr_block = int(blk.get())
+                cfg.ocr_c = int(cc.get())
+                cfg.ocr_torch_threads = max(0, int(torch_thr.get()))
+                cfg.ocr_cv_threads = max(0, int(cv_thr.get()))
+                cfg.ocr_workers = max(1, int(workers.get()))
+                cfg.ocr_conf_threshold = min(1.0, max(0.0, float(conf_thr.get())))
+            except Exception:
+                pass
+            cfg.ocr_threads_autotune = bool(thr_auto.get())
+            cfg.ocr_out_of_process = bool(oop.get())
+            if cfg.ocr_threads_autotune:
+                # Autotune only runs while torch threads are unset
+                cfg.ocr_torch_threads = 0
+                torch_thr.set(0)
+
+        def _ocr_preview():
+            _save_ocr_cfg()
+            app.run_in_background(app.action_ocr_only, ocr_console)
+
+        rbtn = ttk.Frame(ocrp, style="Card.TFrame"); rbtn.pack(anchor="w", pady=8)
+        ttk.Button(rbtn, text="Save OCR Settings", style="Dark.TButton", command=_save_ocr_cfg).pack(side="left", padx=(0, 8))
+        ocr_preview_btn = ttk.Button(rbtn, text="Preview OCR (from region)", style="Dark.TButton", command=_ocr_preview)
+        ocr_preview_btn.pack(side="left")
+        ocr_preview_btn.bind("<Enter>", lambda e: app.prewarm_ocr(), add="+")
+
+        return ocrp
 
     # ------------- OpenAI -------------
-    ai = ttk.Frame(main, style="Dark.TFrame")
-    ttk.Label(ai, text="OpenAI", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
-
-    a1 = ttk.Frame(ai, style="Card.TFrame"); a1.pack(anchor="w", pady=6, fill="x")
-    ttk.Label(a1, text="API Key Env Var:", style="Card.TLabel").pack(side="left", padx=(10, 6), pady=8)
-    api_env = tk.StringVar(value=cfg.openai_api_env)
-    ttk.Entry(a1, textvariable=api_env, width=22, style="Dark.TEntry").pack(side="left")
-
-    ttk.Label(a1, text="Model:", style="Card.TLabel").pack(side="left", padx=(12, 6))
-    model = tk.StringVar(value=cfg.model)
-    ttk.Entry(a1, textvariable=model, width=18, style="Dark.TEntry").pack(side="left")
-
-    ttk.Label(a1, text="Response Tokens:", style="Card.TLabel").pack(side="left", padx=(12, 6))
-    max_tok = tk.IntVar(value=cfg.max_tokens)
-    ttk.Entry(a1, textvariable=max_tok, width=8, style="Dark.TEntry").pack(side="left")
-
-    # System prompt
-    sp = tk.Text(ai, height=6, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
-    sp.pack(fill="x", pady=(8, 8))
-    sp.insert("end", cfg.system_prompt)
-
-    ai_out = tk.Text(ai, height=12, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
-    ai_out.pack(fill="both", expand=True)
-
-    def _apply_ai():
-        cfg.openai_api_env = api_env.get().strip() or "OPENAI_API_KEY"
-        cfg.model = model.get().strip() or "gpt-5"
-        cfg.max_tokens = int(max_tok.get())
-        cfg.system_prompt = sp.get("1.0", "end").strip()
-        if app.client:
-            app.client.reconfigure(cfg.openai_api_env, cfg.model, cfg.max_tokens)
-        else:
-            app.client = ChatGPTClient(cfg.openai_api_env, cfg.model, cfg.max_tokens)
-
-    def _test_poem():
-        try:
-            _apply_ai()
-            poem = app.client.test_poem()
+    def _build_openai():
+        ai = ttk.Frame(main, style="Dark.TFrame")
+        ttk.Label(ai, text="OpenAI", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
+
+        a1 = ttk.Frame(ai, style="Card.TFrame"); a1.pack(anchor="w", pady=6, fill="x")
+        ttk.Label(a1, text="API Key Env Var:", style="Card.TLabel").pack(side="left", padx=(10, 6), pady=8)
+        api_env = tk.StringVar(value=cfg.openai_api_env)
+        ttk.Entry(a1, textvariable=api_env, width=22, style="Dark.TEntry").pack(side="left")
+
+        ttk.Label(a1, text="Model:", style="Card.TLabel").pack(side="left", padx=(12, 6))
+        model = tk.StringVar(value=cfg.model)
+        ttk.Entry(a1, textvariable=model, width=18, style="Dark.TEntry").pack(side="left")
+
+        ttk.Label(a1, text="Response Tokens:", style="Card.TLabel").pack(side="left", padx=(12, 6))
+        max_tok = tk.IntVar(value=cfg.max_tokens)
+        ttk.Entry(a1, textvariable=max_tok, width=8, style="Dark.TEntry").pack(side="left")
+
+        routing = tk.BooleanVar(value=cfg.routing_enabled)
+        ttk.Checkbutton(a1, text="Route by complexity", variable=routing, style="Dark.TCheckbutton").pack(side="left", padx=(12, 10))
+        answer_cache = tk.BooleanVar(value=cfg.answer_cache)
+        ttk.Checkbutton(a1, text="Reuse answers to near-duplicates", variable=answer_cache, style="Dark.TCheckbutton").pack(side="left", padx=(0, 10))
+
+        # System prompt
+        sp = tk.Text(ai, height=6, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
+        sp.pack(fill="x", pady=(8, 8))
+        sp.insert("end", cfg.system_prompt)
+
+        ai_out = tk.Text(ai, height=12, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
+        ai_out.pack(fill="both", expand=True)
+
+        def _apply_ai():
+            cfg.openai_api_env = api_env.get().strip() or "OPENAI_API_KEY"
+            cfg.model = model.get().strip() or "gpt-5"
+            cfg.max_tokens = int(max_tok.get())
+            cfg.system_prompt = sp.get("1.0", "end").strip()
+            cfg.routing_enabled = bool(routing.get())
+            cfg.answer_cache = bool(answer_cache.get())
+            app._router = None  # rebuilt with the new default model / token budget
+            if app.client:
+                app.client.reconfigure(cfg.openai_api_env, cfg.model, cfg.max_tokens)
+            else:
+                from openai_client import ChatGPTClient
+                app.client = ChatGPTClient(cfg.openai_api_env, cfg.model, cfg.max_tokens)
+
+        def _test_poem():
+            try:
+                _apply_ai()
+                poem = app.client.test_poem()
+                ai_out.delete("1.0", "end")
+                ai_out.insert("end", poem or "(empty)")
+            except Exception as e:
+                ai_out.delete("1.0", "end")
+                ai_out.insert("end", f"[error] {e}")
+
+        def _route_stats():
             ai_out.delete("1.0", "end")
-            ai_out.insert("end", poem or "(empty)")
-        except Exception as e:
-            ai_out.delete("1.0", "end")
-            ai_out.insert("end", f"[error] {e}")
-
-    arow = ttk.Frame(ai, style="Card.TFrame"); arow.pack(anchor="w", pady=8)
-    ttk.Button(arow, text="Test API (poem)", style="Dark.TButton", command=_test_poem).pack(side="left", padx=(0, 8))
-    ttk.Button(arow, text="Apply Settings", style="Dark.TButton", command=_apply_ai).pack(side="left")
-
-    pages["openai"] = ai
+            ai_out.insert("end", app.router().summary() or "(no routed questions yet)")
+
+        arow = ttk.Frame(ai, style="Card.TFrame"); arow.pack(anchor="w", pady=8)
+        ttk.Button(arow, text="Test API (poem)", style="Dark.TButton", command=_test_poem).pack(side="left", padx=(0, 8))
+        ttk.Button(arow, text="Apply Settings", style="Dark.TButton", command=_apply_ai).pack(side="left")
+        ttk.Button(arow, text="Route Stats", style="Dark.TButton", command=_route_stats).pack(side="left", padx=(8, 0))
+
+        return ai
+
+    # ------------- History -------------
+    def _build_history():
+        hist = ttk.Frame(main, style="Dark.TFrame")
+        ttk.Label(hist, text="History", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
+
+        style.configure("Dark.Treeview", background=THEME["surface"], fieldbackground=THEME["surface"],
+                        foreground=THEME["fg"], borderwidth=0)
+        style.configure("Dark.Treeview.Heading", background=THEME["btn"], foreground=THEME["fg"], borderwidth=0)
+        style.map("Dark.Treeview", background=[("selected", THEME["indigo"])])
+
+        hcols = ("time", "question", "answer", "total", "cache")
+        htree = ttk.Treeview(hist, columns=hcols, show="headings", height=14, style="Dark.Treeview")
+        for col, label, width in (("time", "Time", 130), ("question", "OCR text", 380),
+                                  ("answer", "Answer", 160), ("total", "Total ms", 80), ("cache", "Cache", 70)):
+            htree.heading(col, text=label)
+            htree.column(col, width=width, stretch=(col == "question"))
+        hscroll = ttk.Scrollbar(hist, orient="vertical", command=htree.yview)
+
+        hist_detail = tk.Text(hist, height=8, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
+
+        hist_state = {"oldest": None, "done": False}
+        HIST_PAGE = 200
+
+        def _hist_load_more():
+            if hist_state["done"]:
+                return
+            try:
+                rows = app.run_history().page(hist_state["oldest"], HIST_PAGE)
+            except Exception as e:
+                hist_detail.delete("1.0", "end")
+                hist_detail.insert("end", f"[error] {e}")
+                hist_state["done"] = True
+                return
+            for r in rows:
+                timings = json.loads(r["timings"] or "{}")
+                total = sum(timings.get(k, 0) for k in ("capture_ms", "ocr_ms", "api_ms"))
+                htree.insert("", "end", iid=str(r["id"]), values=(
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["ts"])),
+                    " ".join((r["ocr_head"] or "").split()),
+                    " ".join((r["answer_head"] or "").split()),
+                    f"{total:.0f}",
+                    r["cache"] or "",
+                ))
+            if rows:
+                hist_state["oldest"] = rows[-1]["id"]
+            if len(rows) < HIST_PAGE:
+                hist_state["done"] = True
+
+        def _hist_refresh():
+            htree.delete(*htree.get_children())
+            hist_state.update(oldest=None, done=False)
+            _hist_load_more()
+
+        def _hist_yscroll(first, last):
+            hscroll.set(first, last)
+            # Lazy paging: fetch the next page when the view nears the bottom
+            if float(last) > 0.9 and not hist_state["done"]:
+                htree.after_idle(_hist_load_more)
+
+        def _hist_select(_e=None):
+            sel = htree.selection()
+            if not sel:
+                return
+            run = app.run_history().get(int(sel[0]))
+            hist_detail.delete("1.0", "end")
+            if not run:
+                return
+            hist_detail.insert("end",
+                f"Region: {_format_region(run['region'])}\n"
+                f"Timings: {run['timings']}\n"
+                f"Settings: {run['settings']}\n\n"
+                f"[OCR]\n{run['ocr_text']}\n\n[Answer]\n{run['answer']}\n")
+
+        htree.configure(yscrollcommand=_hist_yscroll)
+        htree.bind("<<TreeviewSelect>>", _hist_select)
+
+        hrow = ttk.Frame(hist, style="Card.TFrame"); hrow.pack(side="bottom", anchor="w", pady=8)
+        ttk.Button(hrow, text="Refresh", style="Dark.TButton", command=_hist_refresh).pack(side="left")
+        hist_detail.pack(side="bottom", fill="x", pady=(8, 0))
+        hscroll.pack(side="right", fill="y")
+        htree.pack(fill="both", expand=True)
+
+        on_show["history"] = _hist_refresh
+        return hist
 
     # ------------- Logs -------------
-    logs = ttk.Frame(main, style="Dark.TFrame")
-    ttk.Label(logs, text="Logs", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
-    tbox = tk.Text(logs, height=22, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
-    tbox.pack(fill="both", expand=True)
-
-    def refresh_logs():
-        try:
-            with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
-                tbox.delete("1.0", "end")
-                tbox.insert("end", f.read())
-                tbox.see("end")
-        except Exception as e:
-            tbox.insert("end", f"[error] {e}\n")
-
-    btnrow = ttk.Frame(logs, style="Card.TFrame"); btnrow.pack(anchor="w", pady=8)
-    ttk.Button(btnrow, text="Refresh", style="Dark.TButton", command=refresh_logs).pack(side="left", padx=(0, 8))
-    ttk.Button(btnrow, text="Clear", style="Dark.TButton", command=lambda: tbox.delete("1.0", "end")).pack(side="left")
-
-    pages["logs"] = logs
+    def _build_logs():
+        logs = ttk.Frame(main, style="Dark.TFrame")
+        ttk.Label(logs, text="Logs", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
+        tbox = tk.Text(logs, height=22, bg=THEME["surface"], fg=THEME["fg"], insertbackground=THEME["fg"], bd=0, highlightthickness=0)
+        tbox.pack(fill="both", expand=True)
+
+        def refresh_logs():
+            try:
+                with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
+                    tbox.delete("1.0", "end")
+                    tbox.insert("end", f.read())
+                    tbox.see("end")
+            except Exception as e:
+                tbox.insert("end", f"[error] {e}\n")
+
+        btnrow = ttk.Frame(logs, style="Card.TFrame"); btnrow.pack(anchor="w", pady=8)
+        ttk.Button(btnrow, text="Refresh", style="Dark.TButton", command=refresh_logs).pack(side="left", padx=(0, 8))
+        ttk.Button(btnrow, text="Clear", style="Dark.TButton", command=lambda: tbox.delete("1.0", "end")).pack(side="left")
+
+        return logs
 
     # ------------- About -------------
-    about = ttk.Frame(main, style="Dark.TFrame")
-    ttk.Label(about, text="About", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
-    ttk.Label(about, text="ExamGPT — Screen OCR Box to ChatGPT", style="Dark.TLabel").pack(anchor="w")
-    pages["about"] = about
+    def _build_about():
+        about = ttk.Frame(main, style="Dark.TFrame")
+        ttk.Label(about, text="About", style="Dark.TLabel", font=("Segoe UI", 16, "bold")).pack(anchor="w", pady=(0, 12))
+        ttk.Label(about, text="ExamGPT — Screen OCR Box to ChatGPT", style="Dark.TLabel").pack(anchor="w")
+        return about
+
+    builders = {
+        "ocr": _build_ocr,
+        "openai": _build_openai,
+        "history": _build_history,
+        "logs": _build_logs,
+        "about": _build_about,
+    }
 
     # ------------- nav buttons -------------
     def nav_btn(txt, key):
@@ -364,15 +598,11 @@ def gui_main(app: App, cfg: Config, log_path: str):
     nav_btn("Home", "home").pack(fill="x", pady=4, padx=8)
     nav_btn("OCR", "ocr").pack(fill="x", pady=4, padx=8)
     nav_btn("OpenAI", "openai").pack(fill="x", pady=4, padx=8)
+    nav_btn("History", "history").pack(fill="x", pady=4, padx=8)
     nav_btn("Logs", "logs").pack(fill="x", pady=4, padx=8)
     nav_btn("About", "about").pack(fill="x", pady=4, padx=8)
 
     # ---------- helpers ----------
-    def _clear_text(widget: tk.Text):
-        widget.config(state="normal")
-        widget.delete("1.0", "end")
-        widget.config(state="disabled")
-
     def _select_region_update():
         app.action_select_region()
         coords_var.set(_format_region(cfg.region))
@@ -389,16 +619,26 @@ def gui_main(app: App, cfg: Config, log_path: str):
 
     # Hotkeys
     root.bind_all("<Control-Shift-S>", lambda e: _select_region_update())
-    root.bind_all("<Control-Shift-O>", lambda e: app.action_ocr_only(lambda s: console_write(home_out, s)))
-    root.bind_all("<Control-Shift-G>", lambda e: app.action_send_to_chatgpt(lambda s: console_write(home_out, s)))
+    root.bind_all("<Control-Shift-O>", lambda e: app.run_in_background(app.action_ocr_only, home_console))
+    root.bind_all("<Control-Shift-G>", lambda e: app.run_in_background(app.action_send_to_chatgpt, home_console))
 
     # Provide handles
-    app.set_ui(root, lambda s: console_write(home_out, s))
+    app.set_ui(root, home_console)
+
+    # First paint: the first Expose, plus the idle pass that draws it
+    painted = []
+
+    def _after_first_paint():
+        if on_first_paint:
+            on_first_paint()
+        app.deferred_init()
 
-    
+    def _on_expose(_e):
+        if not painted:
+            painted.append(True)
+            root.after_idle(_after_first_paint)
 
-    if app.client is None:
-        app.ensure_client()
+    root.bind("<Expose>", _on_expose, add="+")
 
     show("home")
     root.mainloop()
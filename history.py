@@ -0,0 +1,157 @@
+# history.py
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL NOT NULL,
+    region   TEXT,
+    settings TEXT,
+    ocr_text TEXT,
+    answer   TEXT,
+    timings  TEXT,
+    cache    TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs(ts);
+"""
+
+# Rows carried by page(); full text is only read for the selected entry
+_SUMMARY_COLS = "id, ts, substr(ocr_text, 1, 160) AS ocr_head, substr(answer, 1, 80) AS answer_head, timings, cache"
+
+
+class RunHistory:
+    """
+    Append-only SQLite log of capture -> OCR -> answer runs. Rows are keyed by a
+    monotonically increasing id, so paging newest-first is an index seek no matter
+    how many entries exist. Old rows are compacted away by age and count.
+    """
+    def __init__(self, path: str = "history.sqlite3", retention_days: int = 30,
+                 max_rows: int = 50_000, compact_every: int = 500):
+        self.path = path
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.compact_every = max(1, compact_every)
+        self._lock = threading.Lock()
+        self._appends = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.compact()
+
+    def append(
+        self,
+        *,
+        region: Optional[Sequence[int]],
+        settings: dict,
+        ocr_text: str,
+        answer: str = "",
+        timings: Optional[dict] = None,
+        cache: Optional[str] = None,
+        ts: Optional[float] = None,
+    ) -> int:
+        row = (
+            time.time() if ts is None else ts,
+            json.dumps(list(region)) if region else None,
+            json.dumps(settings, sort_keys=True),
+            ocr_text,
+            answer,
+            json.dumps({k: round(v, 2) for k, v in (timings or {}).items()}),
+            cache,
+        )
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO runs (ts, region, settings, ocr_text, answer, timings, cache) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._db.commit()
+            self._appends += 1
+            rid = int(cur.lastrowid)
+        if self._appends % self.compact_every == 0:
+            self.compact()
+        return rid
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT count(*) FROM runs").fetchone()[0])
+
+    def page(self, before_id: Optional[int] = None, limit: int = 200) -> List[sqlite3.Row]:
+        """Newest-first summaries with id < before_id (keyset pagination)."""
+        with self._lock:
+            if before_id is None:
+                cur = self._db.execute(
+                    f"SELECT {_SUMMARY_COLS} FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+            else:
+                cur = self._db.execute(
+                    f"SELECT {_SUMMARY_COLS} FROM runs WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit))
+            return cur.fetchall()
+
+    def get(self, run_id: int) -> Optional[dict]:
+        with self._lock:
+            r = self._db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if r is None:
+            return None
+        d = dict(r)
+        for k in ("region", "settings", "timings"):
+            d[k] = _loads(d[k])
+        return d
+
+    def iter_answered(self, chunk: int = 1000) -> Iterator[Tuple[str, str]]:
+        """
+        (ocr_text, answer) for runs answered fresh and in full, oldest first: cache
+        hits and degraded answers are left out. Read in id-keyed chunks so the lock
+        is never held for the whole scan.
+        """
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, ocr_text, answer FROM runs WHERE id > ? AND answer != '' AND cache IS NULL "
+                    "AND coalesce(json_extract(settings, '$.result'), 'exact') = 'exact' "
+                    "ORDER BY id LIMIT ?", (last, chunk)).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield r["ocr_text"], r["answer"]
+            last = rows[-1]["id"]
+
+    def compact(self) -> int:
+        """Drop rows past the retention age or beyond max_rows. Returns rows removed."""
+        removed = 0
+        with self._lock:
+            if self.retention_days > 0:
+                cutoff = time.time() - self.retention_days * 86400
+                removed += self._db.execute("DELETE FROM runs WHERE ts < ?", (cutoff,)).rowcount
+            if self.max_rows > 0:
+                removed += self._db.execute(
+                    "DELETE FROM runs WHERE id <= (SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_rows,)).rowcount
+            self._db.commit()
+            if removed > 1000:
+                self._db.execute("VACUUM")
+        if removed:
+            log.info("History compacted: %d rows removed", removed)
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _loads(s: Optional[str]) -> Any:
+    if not s:
+        return None
+    try:
+        return json.loads(s)
+    except Exception:
+        return s
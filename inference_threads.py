@@ -0,0 +1,89 @@
+# inference_threads.py
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+try:
+    import cv2  # optional; only its thread pool is touched here
+except Exception:
+    cv2 = None
+
+
+def apply_threads(torch_threads: int = 0, cv_threads: int = 0) -> Tuple[int, int]:
+    """
+    Set torch intra-op and OpenCV thread counts. 0 leaves that library at its
+    current setting. Returns the effective (torch, cv2) counts.
+    """
+    t = c = 0
+    try:
+        import torch  # pulled in by easyocr anyway
+        if torch_threads > 0:
+            torch.set_num_threads(int(torch_threads))
+        t = int(torch.get_num_threads())
+    except Exception as e:
+        log.debug("torch threads not applied: %s", e)
+    if cv2 is not None:
+        try:
+            if cv_threads > 0:
+                cv2.setNumThreads(int(cv_threads))
+            c = int(cv2.getNumThreads())
+        except Exception as e:
+            log.debug("cv2 threads not applied: %s", e)
+    return t, c
+
+
+def _candidates() -> List[Tuple[int, int]]:
+    n = os.cpu_count() or 1
+    torch_opts = sorted({1, 2, max(1, n // 4), max(1, n // 2), n})
+    out: List[Tuple[int, int]] = []
+    for t in torch_opts:
+        # cv2 either stays out of torch's way or gets the same share
+        for c in sorted({1, t}):
+            out.append((t, c))
+    return out
+
+
+def _time(bench: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeats)):
+        t0 = time.perf_counter()
+        bench()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def autotune(
+    bench: Callable[[], object],
+    candidates: Optional[Iterable[Tuple[int, int]]] = None,
+    repeats: int = 2,
+) -> Tuple[int, int, float]:
+    """
+    Time `bench` (one OCR pass on a sample frame) under several thread settings
+    and keep the fastest. Returns (torch_threads, cv_threads, speedup_vs_default).
+    """
+    default = apply_threads()
+    bench()  # warm-up: model load and first-call allocations
+    base = _time(bench, repeats)
+    best, best_dt = default, base
+
+    for t, c in (candidates or _candidates()):
+        if (t, c) == default:
+            continue
+        apply_threads(t, c)
+        dt = _time(bench, repeats)
+        log.debug("threads torch=%d cv2=%d: %.1f ms", t, c, dt * 1000)
+        if dt < best_dt:
+            best, best_dt = (t, c), dt
+
+    t, c = apply_threads(*best)
+    speedup = base / best_dt if best_dt > 0 else 1.0
+    log.info(
+        "Thread autotune: torch=%d cv2=%d at %.1f ms/frame (%.2fx vs default torch=%d cv2=%d)",
+        t, c, best_dt * 1000, speedup, default[0], default[1],
+    )
+    return t, c, speedup
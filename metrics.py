@@ -0,0 +1,258 @@
+# metrics.py
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+# Latency buckets in milliseconds
+LATENCY_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Counter:
+    """Monotonic count."""
+    __slots__ = ("_v", "_lock")
+
+    def __init__(self):
+        self._v = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self._v += n
+
+    @property
+    def value(self) -> float:
+        return self._v
+
+
+class Gauge:
+    """Point-in-time value: set() directly, or computed by `fn` at collection time."""
+    __slots__ = ("_v", "_fn")
+
+    def __init__(self, fn: Optional[Callable[[], Optional[float]]] = None):
+        self._v = 0.0
+        self._fn = fn
+
+    def set(self, v: float) -> None:
+        self._v = float(v)
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._fn is None:
+            return self._v
+        try:
+            v = self._fn()
+            return None if v is None else float(v)
+        except Exception:
+            return None
+
+
+class Histogram:
+    """Fixed-bucket histogram (milliseconds unless the bounds say otherwise)."""
+    BOUNDS = LATENCY_MS
+
+    def __init__(self, bounds: Sequence[float] = BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, v: float) -> None:
+        i = bisect.bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += v
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cum, buckets = 0, {}
+            for b, n in zip(list(self.bounds) + ["+Inf"], self.counts):
+                cum += n
+                buckets[str(b)] = cum
+            return {"count": self.count, "sum": round(self.sum, 2), "buckets": buckets}
+
+
+class _Family:
+    """A named metric and its children, one per combination of label values."""
+    def __init__(self, kind: str, name: str, help: str, labelnames: Sequence[str], make: Callable[[], object]):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._make = make
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = make()
+
+    def labels(self, *values, **kw):
+        key = tuple(str(v) for v in values) if values else tuple(str(kw[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._make())
+        return child
+
+    # Unlabelled families act like their single child
+    def inc(self, n: float = 1.0) -> None:
+        self._children[()].inc(n)
+
+    def set(self, v: float) -> None:
+        self._children[()].set(v)
+
+    def observe(self, v: float) -> None:
+        self._children[()].observe(v)
+
+    def items(self):
+        return list(self._children.items())
+
+
+def _labelstr(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Registry:
+    """Process-wide set of metric families; get-or-create by name."""
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind: str, name: str, help: str, labelnames: Sequence[str], make) -> _Family:
+        fam = self._families.get(name)
+        if fam is None:
+            with self._lock:
+                fam = self._families.get(name)
+                if fam is None:
+                    fam = self._families[name] = _Family(kind, name, help, labelnames, make)
+        if fam.kind != kind:
+            raise ValueError(f"metric {name} already registered as a {fam.kind}")
+        return fam
+
+    def counter(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> _Family:
+        return self._family("counter", name, help, labelnames, Counter)
+
+    def gauge(self, name: str, help: str = "", labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], Optional[float]]] = None) -> _Family:
+        return self._family("gauge", name, help, labelnames, lambda: Gauge(fn))
+
+    def histogram(self, name: str, help: str = "", labelnames: Sequence[str] = (),
+                  bounds: Sequence[float] = LATENCY_MS) -> _Family:
+        return self._family("histogram", name, help, labelnames, lambda: Histogram(bounds))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        out = []
+        for name, fam in sorted(self._families.items()):
+            out.append(f"# HELP {name} {fam.help or name}")
+            out.append(f"# TYPE {name} {fam.kind}")
+            for values, m in fam.items():
+                if fam.kind == "histogram":
+                    snap = m.snapshot()
+                    for le, n in snap["buckets"].items():
+                        le_label = 'le="%s"' % le
+                        out.append(f"{name}_bucket{_labelstr(fam.labelnames, values, le_label)} {n}")
+                    out.append(f"{name}_sum{_labelstr(fam.labelnames, values)} {_num(snap['sum'])}")
+                    out.append(f"{name}_count{_labelstr(fam.labelnames, values)} {snap['count']}")
+                else:
+                    v = m.value
+                    if v is not None:
+                        out.append(f"{name}{_labelstr(fam.labelnames, values)} {_num(v)}")
+        return "\n".join(out) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view: {name: {"label=value,...": value or histogram snapshot}}."""
+        snap: dict = {}
+        for name, fam in sorted(self._families.items()):
+            series = {}
+            for values, m in fam.items():
+                key = ",".join(f"{n}={v}" for n, v in zip(fam.labelnames, values))
+                series[key] = m.snapshot() if fam.kind == "histogram" else m.value
+            snap[name] = series
+        return snap
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+# ---------- exporters ----------
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        log.debug("%s - " + fmt, self.address_string(), *args)
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> _Server:
+    """GET /metrics on a daemon thread. Port 0 picks a free port."""
+    srv = _Server((host, port), _Handler)
+    srv.registry = registry
+    threading.Thread(target=srv.serve_forever, name="metrics-http", daemon=True).start()
+    log.info("Metrics on http://%s:%d/metrics", *srv.server_address[:2])
+    return srv
+
+
+class SnapshotWriter:
+    """Rewrites `path` with a JSON snapshot every `interval_s` seconds (and on stop())."""
+    def __init__(self, path: str, interval_s: float = 60.0, registry: Registry = REGISTRY):
+        self.path = path
+        self.interval_s = max(1.0, float(interval_s))
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def write(self) -> None:
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ts": time.time(), "metrics": self.registry.snapshot()}, f, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log.warning("Could not write metrics snapshot: %s", e)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.write()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.write()
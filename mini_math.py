@@ -44,3 +44,51 @@ def pick_final_answer(text: str) -> str:
         if m:
             return m.group(0)
     return lines[-1]
+
+# A complete answer after a "Final answer:" label, terminated by a newline (so
+# "4" isn't mistaken for "42"). Only the labelled form is safe: a bare first
+# line may be the first of several answers ("2\n3\n").
+DEFAULT_ANSWER_PATTERN = (
+    r"final answer\s*[:=]\s*"
+    r"(?P<answer>[A-H]|[-+]?\d+(?:,\d{3})*(?:\.\d+)?(?:/\d+)?)"
+    r"[ \t]*[.)]?[ \t]*\n"
+)
+
+# Appended to the system prompt when streaming early stop is on, so replies
+# end in the form DEFAULT_ANSWER_PATTERN recognises
+FINAL_ANSWER_INSTRUCTION = (
+    'End your reply with a line of the form "Final answer: <answer>" '
+    "(a single letter or number), followed by a newline."
+)
+
+class FinalAnswerWatcher:
+    """
+    Fed streamed completion text chunk by chunk; `done` flips once a complete
+    final answer matching `pattern` has been seen. `answer` is the pattern's
+    "answer" group (or the whole match if it has none).
+    """
+    def __init__(self, pattern: str = DEFAULT_ANSWER_PATTERN):
+        self.rx = re.compile(pattern, re.IGNORECASE)
+        self.buf = ""
+        self.answer = ""
+        self.done = False
+
+    def _match(self, text: str) -> bool:
+        m = self.rx.search(text)
+        if m:
+            self.done = True
+            self.answer = (m.groupdict().get("answer") or m.group(0)).strip()
+        return self.done
+
+    def feed(self, chunk: str) -> bool:
+        if self.done or not chunk:
+            return self.done
+        self.buf += chunk
+        return self._match(self.buf)
+
+    def finish(self) -> bool:
+        """End of the reply: the last line counts as complete even without a newline."""
+        return self.done or self._match(self.buf + "\n")
+
+    def result(self) -> str:
+        return self.answer if self.done else self.buf.strip()
@@ -1,28 +1,168 @@
 # ocr.py
 from __future__ import annotations
+import bisect, gc, logging, os, sys, threading, time
 import numpy as np
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 from PIL import Image
 
-# EasyOCR (and torch) are required; we keep it simple and fast.
-import easyocr
+from deadline import Deadline
+from metrics import counter, gauge, histogram
+
+# EasyOCR (and torch) are required, but imported on first use so they stay
+# off the startup path; warm_import() pulls them in early in the background.
+easyocr = None
 
 try:
     import cv2  # optional but useful for adaptive threshold
 except Exception:
     cv2 = None
 
-# Cache the reader once
-_READER: Optional[easyocr.Reader] = None
+log = logging.getLogger(__name__)
+
+# Cache the reader once; released again after an idle period (see release_if_idle)
+_READER: Optional["easyocr.Reader"] = None
+_READER_LOCK = threading.RLock()
+_LAST_USED = 0.0
+_BUSY = 0
+_PRELOADING = False
+_PX_COST = 0.0   # EWMA of readtext seconds per pixel, used to price trimmed pixels
+_OCR_BUDGET_SHARE = 0.5  # share of a request deadline recognition may use
+
+_M_OCR_MS = histogram("examgpt_ocr_ms", "run_ocr wall time by the preprocessing that won", ("variant",))
+_M_OCR_CONF = histogram("examgpt_ocr_confidence", "Mean recognizer confidence per frame",
+                        bounds=(0.3, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95))
+_M_LADDER_RETRIES = counter("examgpt_ocr_ladder_retries_total", "Ladder rungs tried after the first")
+_M_OCR_DEGRADED = counter("examgpt_ocr_degraded_total", "Frames that took a cheaper path to meet a deadline")
+gauge("examgpt_ocr_reader_loaded", "1 while the EasyOCR reader is resident", fn=lambda: float(_READER is not None))
+gauge("examgpt_process_rss_bytes", "Resident set size of this process", fn=lambda: rss_bytes())
+
+# Text with a cap height below _TINY_CAP_PX is enlarged to _UPSCALE_CAP_PX;
+# anything larger is only ever shrunk (to the configured text_height)
+_TINY_CAP_PX = 7
+_UPSCALE_CAP_PX = 12
+
+# Retry ladder, cheapest first: (name, blur, adaptive threshold, upscale)
+LADDER = (
+    ("raw", False, False, 1.0),
+    ("blur", True, False, 1.0),
+    ("adaptive", True, True, 1.0),
+    ("upscaled", True, True, 2.0),
+)
+
+def _rungs(ladder: bool, math_mode: bool, adaptive: bool) -> tuple:
+    """The configured fixed path, followed by the LADDER rungs that differ from it."""
+    fixed = ("fixed", math_mode, adaptive, 1.0)
+    if not ladder:
+        return (fixed,)
+    return (fixed,) + tuple(r for r in LADDER if r[1:] != fixed[1:])
+
+@dataclass
+class OcrResult:
+    text: str
+    confidences: List[float] = field(default_factory=list)  # per detected box
+    mean_conf: float = 0.0          # length-weighted mean of `confidences`
+    variant: str = ""               # preprocessing that produced `text`
+    degraded: bool = False          # a cheaper path was taken to meet a deadline
+    notes: List[str] = field(default_factory=list)
+
+def _easyocr():
+    global easyocr
+    if easyocr is None:
+        import easyocr as _easyocr_mod
+        easyocr = _easyocr_mod
+    return easyocr
+
+def warm_import() -> None:
+    """Import EasyOCR/torch on a background thread."""
+    if easyocr is None:
+        threading.Thread(target=_easyocr, name="ocr-import", daemon=True).start()
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None if it can't be read."""
+    try:
+        import psutil  # type: ignore
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+def _fmt_mb(n: Optional[int]) -> str:
+    return "?" if n is None else f"{n / (1024 * 1024):.0f} MB"
+
+def _trim_allocator() -> None:
+    gc.collect()
+    try:
+        import ctypes
+        if sys.platform.startswith("linux"):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        elif sys.platform == "win32":
+            k32 = ctypes.windll.kernel32
+            k32.SetProcessWorkingSetSize(k32.GetCurrentProcess(), ctypes.c_size_t(-1), ctypes.c_size_t(-1))
+    except Exception as e:
+        log.debug("allocator trim skipped: %s", e)
 
 def _get_reader(lang: str):
-    global _READER
+    global _READER, _LAST_USED
     langs = [lang] if lang else ["en"]
     # EasyOCR expects "en" not "eng"
     langs = ["en" if x in ("eng","en-US","en-GB") else x for x in langs]
-    if _READER is None:
-        _READER = easyocr.Reader(langs, gpu=False)  # CPU ok; avoids surprise torch messages
-    return _READER
+    with _READER_LOCK:
+        if _READER is None:
+            before = rss_bytes()
+            t0 = time.perf_counter()
+            _READER = _easyocr().Reader(langs, gpu=False)  # CPU ok; avoids surprise torch messages
+            log.info("OCR reader loaded in %.1f s (RSS %s -> %s)",
+                     time.perf_counter() - t0, _fmt_mb(before), _fmt_mb(rss_bytes()))
+        _LAST_USED = time.monotonic()
+        return _READER
+
+def reader_loaded() -> bool:
+    return _READER is not None
+
+def preload_reader(lang: str = "eng") -> None:
+    """Load the reader on a background thread if it isn't resident."""
+    global _PRELOADING
+    with _READER_LOCK:
+        if _READER is not None or _PRELOADING:
+            return
+        _PRELOADING = True
+
+    def _load():
+        global _PRELOADING
+        try:
+            _get_reader(lang)
+        except Exception as e:
+            log.warning("OCR reader preload failed: %s", e)
+        finally:
+            _PRELOADING = False
+
+    threading.Thread(target=_load, name="ocr-preload", daemon=True).start()
+
+def release_reader(reason: str = "") -> bool:
+    """Drop the cached reader and hand its memory back to the OS."""
+    global _READER
+    with _READER_LOCK:
+        if _READER is None or _BUSY:
+            return False
+        before = rss_bytes()
+        _READER = None
+    _trim_allocator()
+    log.info("OCR reader released%s (RSS %s -> %s)",
+             f" ({reason})" if reason else "", _fmt_mb(before), _fmt_mb(rss_bytes()))
+    return True
+
+def release_if_idle(idle_s: float) -> bool:
+    if idle_s <= 0 or _READER is None:
+        return False
+    idle = time.monotonic() - _LAST_USED
+    if idle < idle_s:
+        return False
+    return release_reader(f"idle {idle:.0f} s")
 
 def _to_numpy_gray(img: Image.Image) -> np.ndarray:
     if img.mode != "L":
@@ -31,7 +171,280 @@ def _to_numpy_gray(img: Image.Image) -> np.ndarray:
         gray = img
     return np.array(gray)
 
-def run_ocr(
+def _binarize(arr: np.ndarray) -> np.ndarray:
+    """Ink mask (True = foreground) for a grayscale array; ink is the minority class."""
+    if arr.size == 0 or int(arr.max()) - int(arr.min()) < 24:
+        # Flat frame: Otsu would split noise in half
+        return np.zeros(arr.shape, dtype=bool)
+    if cv2 is not None:
+        _, bw = cv2.threshold(arr, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        mask = bw > 0
+    else:
+        mask = arr > arr.mean()
+    if mask.mean() > 0.5:
+        mask = ~mask
+    return mask
+
+def find_text_bbox(img: Image.Image, max_side: int = 800, pad: int = 6) -> Optional[tuple]:
+    """
+    Fast text-block detection on one downscaled frame. Returns (left, top, width, height)
+    of the text in image pixels, or None if nothing text-like was found.
+    """
+    gray = img.convert("L")
+    scale = min(1.0, max_side / max(gray.size))
+    if scale < 1.0:
+        gray = gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))), Image.BILINEAR)
+    arr = np.asarray(gray)
+    mask = _binarize(arr)
+    h, w = mask.shape
+
+    if cv2 is not None:
+        # Smear glyphs into words/lines, then keep blocks that look like text
+        kx = max(3, int(round(w / 60)))
+        blocks = cv2.morphologyEx(mask.astype(np.uint8), cv2.MORPH_CLOSE,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (kx, 3)))
+        n, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+        boxes = []
+        for i in range(1, n):
+            x, y, bw, bh, area = stats[i]
+            if area < 12 or bh < 3:
+                continue                    # specks
+            if bw > 0.97 * w or bh > 0.97 * h:
+                continue                    # frame borders / window chrome
+            if bh <= 2 and bw > 20 * bh:
+                continue                    # rules and underlines
+            boxes.append((x, y, x + bw, y + bh))
+        if not boxes:
+            return None
+        b = np.array(boxes)
+        x0, y0 = b[:, 0].min(), b[:, 1].min()
+        x1, y1 = b[:, 2].max(), b[:, 3].max()
+    else:
+        # Rows/cols with some ink but not solid lines
+        rows = mask.mean(axis=1)
+        cols = mask.mean(axis=0)
+        ry = np.flatnonzero((rows > 0.002) & (rows < 0.95))
+        cx = np.flatnonzero((cols > 0.002) & (cols < 0.95))
+        if ry.size == 0 or cx.size == 0:
+            return None
+        x0, x1, y0, y1 = cx[0], cx[-1] + 1, ry[0], ry[-1] + 1
+
+    inv = 1.0 / scale
+    l = max(0, int(x0 * inv) - pad)
+    t = max(0, int(y0 * inv) - pad)
+    r = min(img.width, int(np.ceil(x1 * inv)) + pad)
+    btm = min(img.height, int(np.ceil(y1 * inv)) + pad)
+    if r - l < 5 or btm - t < 5:
+        return None
+    return (l, t, r - l, btm - t)
+
+def _content_bbox(arr: np.ndarray, pad: int = 8, min_ink: int = 20) -> Optional[tuple]:
+    """
+    (x0, y0, x1, y1) of the ink in a grayscale/binary frame from row and column
+    projections, padded; None for a blank frame.
+    """
+    mask = _binarize(arr)
+    rows = np.count_nonzero(mask, axis=1)
+    if int(rows.sum()) < min_ink:
+        return None
+    cols = np.count_nonzero(mask, axis=0)
+    # Ignore stray specks: a content row/col needs at least two ink pixels
+    ry = np.flatnonzero(rows >= 2)
+    cx = np.flatnonzero(cols >= 2)
+    if ry.size == 0 or cx.size == 0:
+        return None
+    h, w = arr.shape[:2]
+    return (max(0, int(cx[0]) - pad), max(0, int(ry[0]) - pad),
+            min(w, int(cx[-1]) + 1 + pad), min(h, int(ry[-1]) + 1 + pad))
+
+def _cap_height(arr: np.ndarray) -> Optional[float]:
+    """
+    Cap height in pixels, or None. The 75th percentile of glyph-like component
+    heights lands on capitals/ascenders; the median would be the x-height.
+    """
+    mask = _binarize(arr)
+    if not mask.any():
+        return None
+    if cv2 is not None:
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8)
+        if n <= 1:
+            return None
+        w = stats[1:, cv2.CC_STAT_WIDTH]
+        h = stats[1:, cv2.CC_STAT_HEIGHT]
+        a = stats[1:, cv2.CC_STAT_AREA]
+        # Glyph-like: not specks, not long rules, not a box around the whole
+        # frame. Nothing relative to the frame height alone: a trimmed single
+        # line is barely taller than its glyphs
+        H, W = arr.shape[:2]
+        boxed = (h >= 0.9 * H) & (w >= 0.9 * W)
+        keep = (h >= 3) & (a >= 6) & (w <= 4 * h) & ~boxed
+        if int(keep.sum()) < 3:
+            return None
+        return float(np.percentile(h[keep], 75))
+    # Projection fallback: median text-line height, roughly 1.3x the cap height
+    rows = mask.any(axis=1).astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], rows, [0]))))
+    runs = edges[1::2] - edges[::2]
+    runs = runs[runs >= 3]
+    if runs.size == 0:
+        return None
+    return float(np.median(runs)) / 1.3
+
+def _normalize_scale(arr: np.ndarray, target_h: int, max_px: int = 4_000_000) -> tuple:
+    """
+    Downscale text whose cap height is above target_h to about target_h; upscale
+    only tiny text (cap height under _TINY_CAP_PX). Returns (array, factor, cap_h).
+    """
+    ch = _cap_height(arr)
+    if not ch:
+        return arr, 1.0, ch
+    if ch > target_h:
+        f = target_h / ch
+    elif ch < _TINY_CAP_PX:
+        f = _UPSCALE_CAP_PX / ch
+    else:
+        return arr, 1.0, ch
+    if 0.8 <= f <= 1.25:
+        return arr, 1.0, ch  # already close enough
+    f = min(4.0, max(0.25, f))
+    f = min(f, (max_px / max(1, arr.size)) ** 0.5)
+    h, w = arr.shape[:2]
+    size = (max(1, int(round(w * f))), max(1, int(round(h * f))))
+    if cv2 is not None:
+        interp = cv2.INTER_AREA if f < 1 else cv2.INTER_CUBIC
+        out = cv2.resize(arr, size, interpolation=interp)
+    else:
+        out = np.array(Image.fromarray(arr).resize(size, Image.LANCZOS if f < 1 else Image.BICUBIC))
+    return out, f, ch
+
+def _base(img: Image.Image, *, trim: bool = True, text_height: int = 32) -> Optional[np.ndarray]:
+    """Stages shared by every variant: grayscale, content crop, scale. None for a blank frame."""
+    arr = _to_numpy_gray(img)
+
+    # Crop to the content box before scaling, so the resize (and everything
+    # after it) only touches text pixels; blank frames never reach the reader
+    if trim:
+        t0 = time.perf_counter()
+        box = _content_bbox(arr)
+        if box is None:
+            log.info("OCR trim: blank frame, skipped recognition")
+            return None
+        x0, y0, x1, y1 = box
+        before = arr.size
+        arr = arr[y0:y1, x0:x1]
+        removed = before - arr.size
+        if removed:
+            log.info("OCR trim: removed %d px (%.0f%%) in %.1f ms, ~%.0f ms recognition saved",
+                     removed, 100.0 * removed / before, (time.perf_counter() - t0) * 1000,
+                     removed * _PX_COST * 1000)
+
+    # Shrink oversized text (and enlarge only tiny text) before recognition
+    if text_height > 0:
+        t0 = time.perf_counter()
+        before = arr.size
+        arr, f, ch = _normalize_scale(arr, text_height)
+        if f != 1.0:
+            log.info("OCR scale: cap height ~%.0f px, x%.2f in %.1f ms, ~%+.0f ms recognition",
+                     ch, f, (time.perf_counter() - t0) * 1000,
+                     -(before - arr.size) * _PX_COST * 1000)
+    return arr
+
+def _variant(arr: np.ndarray, *, blur: bool, threshold: bool, upscale: float = 1.0,
+             block: int = 25, c: int = 10) -> np.ndarray:
+    if cv2 is None:
+        return arr
+    if upscale != 1.0:
+        f = min(upscale, (4_000_000 / max(1, arr.size)) ** 0.5)
+        if f > 1.0:
+            arr = cv2.resize(arr, (int(arr.shape[1] * f), int(arr.shape[0] * f)),
+                             interpolation=cv2.INTER_CUBIC)
+    # Light denoise for math
+    if blur:
+        arr = cv2.GaussianBlur(arr, (3,3), 0)
+    # Optional adaptive thresholding
+    if threshold:
+        b = block if block % 2 == 1 else block + 1  # must be odd
+        arr = cv2.adaptiveThreshold(arr, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                    cv2.THRESH_BINARY, b, c)
+    return arr
+
+def _prepare(
+    img: Image.Image,
+    *,
+    math_mode: bool = False,
+    adaptive: bool = False,
+    block: int = 25,
+    c: int = 10,
+    trim: bool = True,
+    text_height: int = 32,
+) -> Optional[np.ndarray]:
+    """The fixed (non-ladder) preprocessing path. Returns None for a blank frame."""
+    arr = _base(img, trim=trim, text_height=text_height)
+    if arr is None:
+        return None
+    return _variant(arr, blur=math_mode, threshold=adaptive, block=block, c=c)
+
+def _readtext(arr: np.ndarray, lang: str, **kwargs):
+    """reader.readtext with idle bookkeeping and per-pixel cost tracking."""
+    global _BUSY, _LAST_USED, _PX_COST
+    with _READER_LOCK:
+        reader = _get_reader(lang)
+        _BUSY += 1
+    try:
+        t0 = time.perf_counter()
+        out = reader.readtext(arr, **kwargs)
+        cost = (time.perf_counter() - t0) / max(1, arr.size)
+        _PX_COST = cost if _PX_COST == 0.0 else 0.8 * _PX_COST + 0.2 * cost
+    finally:
+        with _READER_LOCK:
+            _BUSY -= 1
+            _LAST_USED = time.monotonic()
+    return out
+
+def _boxes_to_text(results) -> str:
+    """
+    Join readtext(detail=1) boxes in reading order, laid out like
+    readtext(paragraph=True): words on a line and lines of one paragraph are
+    joined by spaces, paragraphs by newlines.
+    """
+    items = []
+    for box, text, *_ in results:
+        ys = [p[1] for p in box]
+        xs = [p[0] for p in box]
+        items.append((min(ys), max(ys), min(xs), max(xs), text))
+    items.sort()
+    lines: list = []
+    for top, bottom, left, right, text in items:
+        # Same line if the box's vertical centre falls inside the current line
+        mid = (top + bottom) / 2
+        if lines and lines[-1][0] <= mid <= lines[-1][1]:
+            ln = lines[-1]
+            ln[1], ln[2], ln[3] = max(ln[1], bottom), min(ln[2], left), max(ln[3], right)
+            ln[4].append((left, text))
+        else:
+            lines.append([top, bottom, left, right, [(left, text)]])
+    paras: list = []
+    for top, bottom, left, right, parts in lines:
+        text = " ".join(t for _, t in sorted(parts))
+        # EasyOCR's grouping: within half a line height vertically and one
+        # line height horizontally of the paragraph so far
+        if paras:
+            p = paras[-1]
+            h = (bottom - top + p[4]) / 2
+            if top - p[1] <= 0.5 * h and left <= p[3] + h and right >= p[2] - h:
+                p[1], p[2], p[3] = max(p[1], bottom), min(p[2], left), max(p[3], right)
+                p[5].append(text)
+                continue
+        paras.append([top, bottom, left, right, bottom - top, [text]])
+    return "\n".join(" ".join(p[5]) for p in paras).strip()
+
+def _mean_conf(results) -> float:
+    total = sum(len(t) for _, t, _ in results)
+    if not total:
+        return 0.0
+    return float(sum(len(t) * conf for _, t, conf in results) / total)
+
+def run_ocr_detailed(
     img: Image.Image,
     *,
     engine: str = "easy",          # ignored, kept for compatibility
@@ -40,21 +453,121 @@ def run_ocr(
     adaptive: bool = False,
     block: int = 25,
     c: int = 10,
-) -> str:
+    trim: bool = True,
+    text_height: int = 32,
+    ladder: bool = False,
+    conf_threshold: float = 0.6,
+    deadline: Optional[Deadline] = None,
+) -> OcrResult:
+    """
+    run_ocr with EasyOCR's per-box confidences kept. math_mode/adaptive pick
+    the fixed preprocessing path. With `ladder`, that path is tried first and the
+    frame then climbs the rest of LADDER (raw -> blur -> adaptive -> upscaled)
+    only while the mean confidence stays below `conf_threshold`; the
+    best-scoring rung is returned.
+    """
+    t_start = time.perf_counter()
+    base = _base(img, trim=trim, text_height=text_height)
+    if base is None:
+        _M_OCR_MS.labels("blank").observe((time.perf_counter() - t_start) * 1000)
+        return OcrResult("")
+
+    rungs = _rungs(ladder, math_mode, adaptive)
+    best: Optional[OcrResult] = None
+    notes: List[str] = []
+    degraded = False
+    tried = []
+
+    for i, (name, blur, thresh, up) in enumerate(rungs):
+        arr = _variant(base, blur=blur, threshold=thresh, upscale=up, block=block, c=c)
+
+        if deadline is not None and deadline.enabled:
+            if deadline.expired():
+                degraded = True
+                notes.append("deadline expired before recognition" if i == 0 else f"ladder stopped before {name}")
+                break
+            budget = deadline.remaining() * _OCR_BUDGET_SHARE
+            est = arr.size * _PX_COST
+            if _PX_COST > 0 and est > budget:
+                if i > 0:
+                    # Keep what we have rather than blow the budget on a harder rung
+                    degraded = True
+                    notes.append(f"ladder stopped before {name}")
+                    break
+                # Shrink the frame if the recognizer is unlikely to finish within our share
+                f = max(0.5, (budget / est) ** 0.5)
+                size = (max(1, int(arr.shape[1] * f)), max(1, int(arr.shape[0] * f)))
+                if cv2 is not None:
+                    arr = cv2.resize(arr, size, interpolation=cv2.INTER_AREA)
+                else:
+                    arr = np.array(Image.fromarray(arr).resize(size, Image.BILINEAR))
+                degraded = True
+                notes.append(f"downscaled x{f:.2f} for deadline")
+                log.info("OCR deadline: ~%.0f ms estimated vs %.0f ms budget, downscaled x%.2f",
+                         est * 1000, budget * 1000, f)
+
+        results = _readtext(arr, lang, detail=1, paragraph=False)
+        conf = _mean_conf(results)
+        tried.append(f"{name} {conf:.2f}")
+        if best is None or conf > best.mean_conf:
+            best = OcrResult(_boxes_to_text(results), [float(r[2]) for r in results], conf, name)
+        if conf >= conf_threshold:
+            break
+
+    if ladder and tried:
+        log.info("OCR ladder: %s (kept %s)", " -> ".join(tried), best.variant if best else "-")
+    res = best or OcrResult("")
+    res.degraded = degraded
+    res.notes = notes
+    _M_OCR_MS.labels(res.variant or "none").observe((time.perf_counter() - t_start) * 1000)
+    if tried:
+        _M_OCR_CONF.observe(res.mean_conf)
+    if len(tried) > 1:
+        _M_LADDER_RETRIES.inc(len(tried) - 1)
+    if degraded:
+        _M_OCR_DEGRADED.inc()
+    return res
+
+def run_ocr(img: Image.Image, **kwargs) -> str:
     """OCR with EasyOCR only. No Tesseract, no warnings."""
-    arr = _to_numpy_gray(img)
+    return run_ocr_detailed(img, **kwargs).text
 
-    # Light denoise for math
-    if math_mode and cv2 is not None:
-        arr = cv2.GaussianBlur(arr, (3,3), 0)
+def run_ocr_batch(imgs, *, engine: str = "easy", lang: str = "eng", gap: int = 48,
+                  ladder: bool = False, conf_threshold: float = 0.6, **opts) -> list:
+    """
+    OCR several frames with a single recognizer call: prepared frames are stacked
+    vertically on one canvas (separated by `gap` rows of background) and the boxes
+    are split back out by position. Batches always take the fixed path; the
+    confidence ladder is per frame (run_ocr_detailed).
+    """
+    prepared = [_prepare(im, **opts) for im in imgs]
+    live = [(i, a) for i, a in enumerate(prepared) if a is not None]
+    texts = [""] * len(prepared)
+    if not live:
+        return texts
+    if len(live) == 1:
+        i, a = live[0]
+        texts[i] = _boxes_to_text(_readtext(a, lang, detail=1, paragraph=False))
+        return texts
 
-    # Optional adaptive thresholding
-    if adaptive and cv2 is not None:
-        b = block if block % 2 == 1 else block + 1  # must be odd
-        arr = cv2.adaptiveThreshold(arr, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
-                                    cv2.THRESH_BINARY, b, c)
+    width = max(a.shape[1] for _, a in live)
+    parts, starts, y = [], [], 0
+    for _, a in live:
+        edge = np.concatenate((a[0], a[-1], a[:, 0], a[:, -1]))
+        bg = np.uint8(np.median(edge))
+        if a.shape[1] < width:
+            a = np.hstack((a, np.full((a.shape[0], width - a.shape[1]), bg, np.uint8)))
+        parts += [a, np.full((gap, width), bg, np.uint8)]
+        starts.append(y)
+        y += a.shape[0] + gap
+    canvas = np.vstack(parts[:-1])
 
-    reader = _get_reader(lang)
-    lines = reader.readtext(arr, detail=False, paragraph=True)
-    text = "\n".join(lines).strip()
-    return text
+    per_frame: list = [[] for _ in live]
+    for box, text, conf in _readtext(canvas, lang, detail=1, paragraph=False):
+        mid = (min(p[1] for p in box) + max(p[1] for p in box)) / 2
+        k = max(0, bisect.bisect_right(starts, mid) - 1)
+        off = starts[k]
+        per_frame[k].append(([(p[0], p[1] - off) for p in box], text, conf))
+    for (i, _), res in zip(live, per_frame):
+        texts[i] = _boxes_to_text(res)
+    return texts
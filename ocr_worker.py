@@ -0,0 +1,340 @@
+# ocr_worker.py
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from metrics import counter
+
+log = logging.getLogger(__name__)
+
+# Time allowed past an OCR budget for the worker to notice it and reply
+_REPLY_SLACK_S = 1.0
+
+_M_RESTARTS = counter("examgpt_ocr_worker_restarts_total", "OCR worker processes replaced after a crash or hang")
+
+
+# ----------------------------
+# Child process
+# ----------------------------
+def _worker_main(conn, torch_threads: int, cv_threads: int) -> None:
+    # Heavy imports happen here, never in the GUI process
+    import ocr
+    from deadline import Deadline
+    from inference_threads import apply_threads
+
+    apply_threads(torch_threads, cv_threads)
+    shm: Optional[shared_memory.SharedMemory] = None
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        # Every reply carries the request's sequence number, so the parent can
+        # drop answers to requests it already gave up on
+        seq, cmd = msg[0], msg[1]
+        try:
+            if cmd == "ocr":
+                _, _, name, shape, kwargs, budget = msg
+                if budget is not None and budget <= 0:
+                    # Deadline(0) would mean "no deadline"; this one has already passed
+                    conn.send((seq, "ok", _expired()))
+                    continue
+                if shm is None or shm.name != name:
+                    if shm is not None:
+                        shm.close()
+                    shm = shared_memory.SharedMemory(name=name)
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+                # Copy out so the parent may reuse the buffer as soon as we reply
+                img = Image.fromarray(frame.copy(), mode="L")
+                del frame
+                dl = Deadline(budget) if budget is not None else None
+                conn.send((seq, "ok", ocr.run_ocr_detailed(img, deadline=dl, **kwargs)))
+            elif cmd == "ping":
+                conn.send((seq, "pong", os.getpid(), ocr.reader_loaded(), ocr.rss_bytes()))
+            elif cmd == "preload":
+                ocr.preload_reader(msg[2])
+                conn.send((seq, "ok", None))
+            elif cmd == "idle":
+                conn.send((seq, "ok", ocr.release_if_idle(msg[2])))
+            elif cmd == "threads":
+                conn.send((seq, "ok", apply_threads(msg[2], msg[3])))
+            elif cmd == "stop":
+                break
+            else:
+                conn.send((seq, "err", f"unknown command {cmd!r}"))
+        except Exception as e:
+            conn.send((seq, "err", f"{type(e).__name__}: {e}"))
+
+    if shm is not None:
+        shm.close()
+
+
+def _expired():
+    from ocr import OcrResult
+    return OcrResult("", degraded=True, notes=["deadline expired before recognition"])
+
+
+# ----------------------------
+# Parent-side handle
+# ----------------------------
+class WorkerBusy(RuntimeError):
+    """The worker is processing a frame and the caller chose not to wait."""
+
+
+class _Worker:
+    def __init__(self, ctx, index: int, torch_threads: int, cv_threads: int, timeout: float):
+        self.ctx = ctx
+        self.index = index
+        self.torch_threads = torch_threads
+        self.cv_threads = cv_threads
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self.conn = None
+        self.proc = None
+        self.restarts = 0
+        self._seq = 0
+        self._spawn()
+
+    def _spawn(self) -> None:
+        parent, child = self.ctx.Pipe()
+        self.proc = self.ctx.Process(
+            target=_worker_main,
+            args=(child, self.torch_threads, self.cv_threads),
+            name=f"ocr-worker-{self.index}",
+            daemon=True,
+        )
+        self.proc.start()
+        child.close()
+        self.conn = parent
+        log.info("OCR worker %d started (pid %s)", self.index, self.proc.pid)
+
+    def restart(self, reason: str) -> None:
+        log.warning("Restarting OCR worker %d: %s", self.index, reason)
+        self._kill()
+        self.restarts += 1
+        _M_RESTARTS.inc()
+        self._spawn()
+
+    def _kill(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        if self.proc is not None and self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join(2)
+            if self.proc.is_alive():
+                self.proc.kill()
+
+    def _call(self, msg: tuple, timeout: Optional[float] = None):
+        self._seq += 1
+        seq = self._seq
+        self.conn.send((seq, *msg))
+        end = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            left = end - time.monotonic()
+            if left <= 0 or not self.conn.poll(left):
+                raise TimeoutError(f"worker {self.index} did not answer {msg[0]!r}")
+            rseq, status, payload, *rest = self.conn.recv()
+            if rseq == seq:
+                break
+            # Late answer to a request that already timed out
+            log.debug("worker %d: dropping stale reply #%d", self.index, rseq)
+        if status == "err":
+            raise RuntimeError(payload)
+        return (payload, *rest) if rest else payload
+
+    def _frame_buffer(self, nbytes: int) -> shared_memory.SharedMemory:
+        # One buffer per worker, reused across frames and grown on demand
+        if self.shm is None or self.shm.size < nbytes:
+            self._free_shm()
+            self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1 << 20))
+        return self.shm
+
+    def _free_shm(self) -> None:
+        if self.shm is not None:
+            try:
+                self.shm.close()
+                self.shm.unlink()
+            except Exception:
+                pass
+            self.shm = None
+
+    def ocr(self, frame: np.ndarray, kwargs: dict, budget: Optional[float] = None):
+        # With a budget, wait only that long (plus slack for the reply); the worker
+        # is slow rather than hung then, so it's kept and its late reply dropped
+        wait = self.timeout if budget is None else min(self.timeout, budget + _REPLY_SLACK_S)
+        with self.lock:
+            for attempt in (1, 2):
+                if not self.proc.is_alive():
+                    self.restart(f"exit code {self.proc.exitcode}")
+                shm = self._frame_buffer(frame.nbytes)
+                np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf)[...] = frame
+                try:
+                    return self._call(("ocr", shm.name, frame.shape, kwargs, budget), wait)
+                except TimeoutError:
+                    if wait < self.timeout:
+                        raise
+                    self.restart(f"no answer in {wait:.0f} s")
+                    if attempt == 2:
+                        raise
+                except (EOFError, OSError) as e:
+                    # Native crash or hang: replace the process and retry once
+                    self.restart(str(e) or type(e).__name__)
+                    if attempt == 2:
+                        raise
+        return None
+
+    def command(self, *msg, timeout: Optional[float] = None, block: bool = True):
+        """Send one command; with block=False, raise WorkerBusy instead of waiting for a frame."""
+        if not self.lock.acquire(blocking=block):
+            raise WorkerBusy(f"worker {self.index} is busy")
+        try:
+            if not self.proc.is_alive():
+                self.restart(f"exit code {self.proc.exitcode}")
+            return self._call(msg, timeout)
+        finally:
+            self.lock.release()
+
+    def close(self) -> None:
+        with self.lock:
+            try:
+                self.conn.send((0, "stop"))
+            except Exception:
+                pass
+            if self.proc is not None:
+                self.proc.join(2)
+            self._kill()
+            self._free_shm()
+
+
+class OcrWorkerPool:
+    """
+    Long-lived OCR subprocesses. Frames go through shared memory (one reusable
+    buffer per worker), results come back over a pipe. Workers that die or stop
+    answering pings are restarted.
+    """
+    def __init__(self, workers: int = 1, torch_threads: int = 0, cv_threads: int = 0,
+                 timeout: float = 120.0):
+        ctx = mp.get_context("spawn")  # never fork a process that owns a Tk root
+        n = max(1, int(workers))
+        if torch_threads <= 0 and n > 1:
+            # Split the cores instead of letting every worker claim all of them
+            torch_threads = max(1, (os.cpu_count() or 1) // n)
+        self._workers: List[_Worker] = [
+            _Worker(ctx, i, torch_threads, cv_threads, timeout) for i in range(n)
+        ]
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for w in self._workers:
+            self._idle.put(w)
+        self._exec = ThreadPoolExecutor(max_workers=n, thread_name_prefix="ocr-dispatch")
+        # Preload/idle/health commands run here so the caller (the Tk thread) never waits
+        self._maint = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-maint")
+        self.timeout = timeout
+
+    @property
+    def size(self) -> int:
+        return len(self._workers)
+
+    @staticmethod
+    def _frame(img: Image.Image) -> np.ndarray:
+        # run_ocr works on grayscale; converting here sends a third of the bytes
+        gray = img if img.mode == "L" else img.convert("L")
+        return np.ascontiguousarray(np.asarray(gray, dtype=np.uint8))
+
+    def run_detailed(self, img: Image.Image, deadline=None, **kwargs):
+        """OcrResult for one frame; `deadline` is forwarded as the remaining budget."""
+        budget = deadline.remaining() if deadline is not None and deadline.enabled else None
+        if budget is not None and budget <= 0:
+            # Don't tie up a worker with a frame nobody will wait for
+            return _expired()
+        w = self._idle.get()
+        try:
+            t0 = time.perf_counter()
+            res = w.ocr(self._frame(img), kwargs, budget)
+            log.debug("worker %d OCR in %.1f ms", w.index, (time.perf_counter() - t0) * 1000)
+            return res
+        finally:
+            self._idle.put(w)
+
+    def run(self, img: Image.Image, **kwargs) -> str:
+        return self.run_detailed(img, **kwargs).text
+
+    def map(self, imgs: Sequence[Image.Image], **kwargs) -> List[str]:
+        """OCR several frames (e.g. multiple regions) spread over all workers."""
+        return list(self._exec.map(lambda im: self.run(im, **kwargs), imgs))
+
+    def _broadcast(self, *msg, timeout: Optional[float] = None, block: bool = True) -> list:
+        """Send `msg` to every worker; with block=False, busy workers are skipped (None)."""
+        out = []
+        for w in self._workers:
+            try:
+                out.append(w.command(*msg, timeout=timeout, block=block))
+            except WorkerBusy:
+                log.debug("OCR worker %d busy, skipped %s", w.index, msg[0])
+                out.append(None)
+            except Exception as e:
+                log.warning("OCR worker %d %s failed: %s", w.index, msg[0], e)
+                out.append(None)
+        return out
+
+    def preload(self, lang: str = "eng") -> Future:
+        """Load the reader in every free worker, in the background (a busy one has it)."""
+        return self._maint.submit(self._broadcast, "preload", lang, timeout=self.timeout, block=False)
+
+    def release_if_idle(self, idle_s: float) -> Optional[Future]:
+        """Background release; busy workers are skipped and asked again next time."""
+        if idle_s <= 0:
+            return None
+        return self._maint.submit(self._broadcast, "idle", idle_s, timeout=5, block=False)
+
+    def maintain(self, idle_s: float) -> Future:
+        """health_check, then release_if_idle, in the background."""
+        def run():
+            self.health_check()
+            if idle_s > 0:
+                self._broadcast("idle", idle_s, timeout=5, block=False)
+        return self._maint.submit(run)
+
+    def set_threads(self, torch_threads: int, cv_threads: int) -> None:
+        self._broadcast("threads", torch_threads, cv_threads, timeout=5)
+
+    def health_check(self, timeout: float = 5.0) -> int:
+        """Ping every idle worker; restart the ones that don't answer. Returns restarts."""
+        restarted = 0
+        for w in self._workers:
+            # Held from the ping through the restart, so no frame can slip in between
+            if not w.lock.acquire(blocking=False):
+                continue  # busy with a frame, so alive enough
+            try:
+                ok = w.proc.is_alive()
+                if ok:
+                    try:
+                        w._call(("ping",), timeout)
+                    except Exception:
+                        ok = False
+                if not ok:
+                    w.restart("failed health check")
+                    restarted += 1
+            finally:
+                w.lock.release()
+        return restarted
+
+    def close(self) -> None:
+        self._exec.shutdown(wait=False)
+        self._maint.shutdown(wait=False, cancel_futures=True)
+        for w in self._workers:
+            w.close()
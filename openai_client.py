@@ -1,6 +1,19 @@
 # openai_client.py
 from __future__ import annotations
-import os, json, requests
+import os, json, time, logging, requests
+
+from metrics import counter, histogram
+from mini_math import FinalAnswerWatcher
+
+log = logging.getLogger(__name__)
+
+# Ceiling for the one retry after a reply came back empty at the token limit
+_MAX_RETRY_TOKENS = 8192
+
+_M_REQUESTS = counter("examgpt_api_requests_total", "Chat completion calls by outcome", ("model", "outcome"))
+_M_LATENCY = histogram("examgpt_api_ms", "Chat completion wall time", ("model",))
+_M_TOKENS = counter("examgpt_api_tokens_total", "Tokens used (estimated for early-stopped streams)", ("model", "kind"))
+_M_EARLY_STOPS = counter("examgpt_api_early_stops_total", "Streams closed as soon as the final answer arrived")
 
 class ChatGPTClient:
     def __init__(self, api_env: str = "OPENAI_API_KEY", model: str = "gpt-5", max_tokens: int = 256):
@@ -9,6 +22,13 @@ class ChatGPTClient:
         self.max_tokens = max_tokens
         self.api_key = os.environ.get(api_env, "")
         self.base_url = "https://api.openai.com/v1/chat/completions"
+        # Streaming early-stop bookkeeping (see _ask_streaming)
+        self.last_stats: dict = {}
+        self.last_usage: dict = {}      # token usage of the last call (estimated if a stream was cut short)
+        self.last_finish_reason = ""
+        self._full_tokens = 0.0     # EWMA of output tokens when a stream runs to the end
+        self._token_s = 0.0         # EWMA of seconds per streamed token
+        self._no_stream: set = set()    # models whose streaming requests were rejected
 
     def reconfigure(self, api_env: str, model: str, max_tokens: int):
         self.api_env = api_env
@@ -24,8 +44,8 @@ class ChatGPTClient:
             "Content-Type": "application/json",
         }
 
-    def _post(self, payload: dict):
-        r = requests.post(self.base_url, headers=self._headers(), data=json.dumps(payload), timeout=60)
+    def _post(self, payload: dict, timeout: float = 60):
+        r = requests.post(self.base_url, headers=self._headers(), data=json.dumps(payload), timeout=timeout)
         if r.status_code >= 400:
             try:
                 msg = r.json()
@@ -39,23 +59,82 @@ class ChatGPTClient:
         key = "max_completion_tokens" if self.model.startswith("gpt-5") else "max_tokens"
         return {key: int(self.max_tokens)}
 
-    def ask(self, system: str, user: str, max_tokens: int | None = None) -> str:
-        if max_tokens is not None:
-            self.max_tokens = max_tokens
-
-        token_key = "max_completion_tokens" if str(self.model).startswith("gpt-5") else "max_tokens"
+    def _payload(self, system: str, user: str, model: str | None = None,
+                 reasoning_effort: str | None = None) -> dict:
+        model = model or self.model
+        token_key = "max_completion_tokens" if str(model).startswith("gpt-5") else "max_tokens"
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": [
                 {"role": "system", "content": system or "You are a helpful assistant."},
                 {"role": "user", "content": user},
             ],
             token_key: int(self.max_tokens),
         }
-        data = self._post(payload)
+        # Only reasoning models accept an effort hint
+        if reasoning_effort and str(model).startswith(("gpt-5", "o1", "o3", "o4")):
+            payload["reasoning_effort"] = reasoning_effort
+        return payload
+
+    def ask(self, system: str, user: str, max_tokens: int | None = None,
+            stop_pattern: str | None = None, model: str | None = None,
+            timeout: float = 60, reasoning_effort: str | None = None) -> str:
+        """`model` overrides the configured model for this call; `timeout` bounds the HTTP call."""
+        if max_tokens is not None:
+            self.max_tokens = max_tokens
+        payload = self._payload(system, user, model, reasoning_effort)
+        t0 = time.perf_counter()
+        outcome = "error"
+        try:
+            text = None
+            if stop_pattern and payload["model"] not in self._no_stream:
+                try:
+                    text = self._ask_streaming(payload, stop_pattern, timeout)
+                except requests.HTTPError as e:
+                    code = getattr(e.response, "status_code", 0)
+                    # e.g. gpt-5/o-series streaming needs a verified organization
+                    if not 400 <= code < 500 or code == 429:
+                        raise
+                    log.warning("Streaming rejected for %s (%s); using non-streaming requests",
+                                payload["model"], code)
+                    self._no_stream.add(payload["model"])
+            if text is None:
+                text = self._ask_once(payload, timeout)
+                if stop_pattern:
+                    # The prompt still asked for a labelled answer; take it out
+                    w = FinalAnswerWatcher(stop_pattern)
+                    w.feed(text)
+                    w.finish()
+                    text = w.result()
+            key = "max_completion_tokens" if "max_completion_tokens" in payload else "max_tokens"
+            if not text and self.last_finish_reason == "length" and payload[key] < _MAX_RETRY_TOKENS:
+                # Reasoning used the whole budget before any visible output
+                payload[key] = min(_MAX_RETRY_TOKENS, payload[key] * 4)
+                log.warning("Empty reply from %s at the token limit; retrying with %s=%d",
+                            payload["model"], key, payload[key])
+                text = self._ask_once(payload, timeout)
+            outcome = "ok"
+            return text
+        except requests.Timeout:
+            outcome = "timeout"
+            raise
+        finally:
+            m = payload["model"]
+            _M_REQUESTS.labels(m, outcome).inc()
+            _M_LATENCY.labels(m).observe((time.perf_counter() - t0) * 1000)
+            if outcome == "ok":
+                for kind in ("prompt_tokens", "completion_tokens"):
+                    n = self.last_usage.get(kind)
+                    if n:
+                        _M_TOKENS.labels(m, kind[:-len("_tokens")]).inc(n)
+
+    def _ask_once(self, payload: dict, timeout: float = 60) -> str:
+        data = self._post(payload, timeout)
+        self.last_usage = dict((data or {}).get("usage") or {})
 
         # Be defensive about the shape
         choices = (data or {}).get("choices") or []
+        self.last_finish_reason = (choices[0].get("finish_reason") or "") if choices else ""
         if not choices:
             return ""
         msg = choices[0].get("message") or {}
@@ -63,5 +142,80 @@ class ChatGPTClient:
         refusal = (msg.get("refusal") or "").strip()
         return content or refusal or ""
     
+    def _ask_streaming(self, payload: dict, stop_pattern: str, timeout: float = 60) -> str:
+        """
+        Stream the completion and hang up as soon as a complete final answer
+        matching `stop_pattern` has arrived. Savings are estimated from streams
+        that ran to completion and recorded in `last_stats`.
+        """
+        payload = dict(payload, stream=True, stream_options={"include_usage": True})
+        watcher = FinalAnswerWatcher(stop_pattern)
+        t0 = time.perf_counter()
+        first = last = None
+        chunks = 0
+        usage = None
+        early = False
+        refusal = ""
+        finish = ""
+
+        r = requests.post(self.base_url, headers=self._headers(), data=json.dumps(payload),
+                          timeout=timeout, stream=True)
+        try:
+            r.raise_for_status()
+            for line in r.iter_lines(decode_unicode=True):
+                if time.perf_counter() - t0 > timeout:
+                    # requests' timeout is per read; enforce the overall budget here
+                    raise requests.Timeout(f"stream exceeded {timeout:.1f} s budget")
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                evt = json.loads(data)
+                usage = evt.get("usage") or usage
+                for ch in evt.get("choices") or []:
+                    finish = ch.get("finish_reason") or finish
+                    d = ch.get("delta") or {}
+                    refusal += d.get("refusal") or ""
+                    delta = d.get("content") or ""
+                    if not delta:
+                        continue
+                    last = time.perf_counter()
+                    first = first or last
+                    chunks += 1   # one content chunk is roughly one token
+                    watcher.feed(delta)
+                if watcher.done:
+                    early = True
+                    break
+        finally:
+            r.close()   # closing mid-stream is what stops generation
+
+        elapsed = time.perf_counter() - t0
+        if chunks > 1 and first and last and last > first:
+            per_tok = (last - first) / (chunks - 1)
+            self._token_s = per_tok if not self._token_s else 0.8 * self._token_s + 0.2 * per_tok
+        stats = {"early_stop": early, "elapsed_ms": elapsed * 1000, "output_tokens": chunks}
+        if early:
+            _M_EARLY_STOPS.inc()
+            saved_tok = max(0.0, self._full_tokens - chunks) if self._full_tokens else None
+            stats["saved_tokens_est"] = saved_tok
+            stats["saved_ms_est"] = saved_tok * self._token_s * 1000 if saved_tok is not None else None
+            log.info("Early stop after %d tokens in %.0f ms (~%s tokens, ~%s ms saved)",
+                     chunks, elapsed * 1000,
+                     "?" if saved_tok is None else f"{saved_tok:.0f}",
+                     "?" if stats["saved_ms_est"] is None else f"{stats['saved_ms_est']:.0f}")
+            # The stream was cut before the usage event; estimate (~4 chars per prompt token)
+            prompt_chars = sum(len(m["content"]) for m in payload["messages"])
+            self.last_usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": chunks, "estimated": True}
+        else:
+            self.last_usage = dict(usage or {"completion_tokens": chunks})
+            full = float((usage or {}).get("completion_tokens") or chunks)
+            self._full_tokens = full if not self._full_tokens else 0.8 * self._full_tokens + 0.2 * full
+        self.last_stats = stats
+        self.last_finish_reason = finish
+        if not early:
+            watcher.finish()
+        return watcher.result() or refusal.strip()
+
     def test_poem(self) -> str:
         return self.ask("Write a two-line poem.", "About a kite.")
@@ -86,9 +86,13 @@ class RegionSelector:
     """
     Drag-to-select region overlay. Uses a single border-only Canvas rectangle
     on a nearly transparent full-screen Toplevel. No 'fullscreen' flag (so no Tk errors).
+
+    With snap=True, releasing the mouse looks for text inside the drag and previews
+    the tighter rectangle: Enter takes it, Space keeps the drag, Esc cancels.
     """
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, snap: bool = False):
         self.root = root
+        self.snap = snap
         self.sel_win = tk.Toplevel(self.root)
         self.sel_win.overrideredirect(True)
         self.sel_win.attributes("-topmost", True)
@@ -113,12 +117,17 @@ class RegionSelector:
         self._start: Optional[Tuple[int, int]] = None
         self._rect = None
         self._result: Optional[Tuple[int, int, int, int]] = None
+        self._drag: Optional[Tuple[int, int, int, int]] = None
+        self._snapped: Optional[Tuple[int, int, int, int]] = None
+        self._preview = []
 
         # Events
         self.canvas.bind("<Button-1>", self._on_press)
         self.canvas.bind("<B1-Motion>", self._on_drag)
         self.canvas.bind("<ButtonRelease-1>", self._on_release)
         self.sel_win.bind("<Escape>", self._on_escape)
+        self.sel_win.bind("<Return>", self._on_accept_snap)
+        self.sel_win.bind("<space>", self._on_keep_drag)
 
         # Modal
         self.sel_win.lift()
@@ -132,6 +141,7 @@ class RegionSelector:
         if self._rect is not None:
             self.canvas.delete(self._rect)
             self._rect = None
+        self._clear_preview()
 
     def _on_drag(self, e):
         if not self._start:
@@ -158,9 +168,71 @@ class RegionSelector:
         if w < 5 or h < 5:
             return self._cancel()
 
+        if self.snap:
+            snapped = self._find_snap((l, t, w, h))
+            if snapped:
+                self._drag = (l, t, w, h)
+                self._show_preview(snapped)
+                return
+
         self._result = (l, t, w, h)
         self._close()
 
+    # ---------- snap to text ----------
+    def _find_snap(self, region: Tuple[int, int, int, int]) -> Optional[Tuple[int, int, int, int]]:
+        l, t, w, h = region
+        try:
+            from PIL import ImageGrab
+            from ocr import find_text_bbox
+            img = ImageGrab.grab(bbox=(l, t, l + w, t + h), all_screens=True)
+            box = find_text_bbox(img)
+        except Exception:
+            return None
+        if not box:
+            return None
+        bl, bt, bw, bh = box
+        # Only offer it if it actually saves something
+        if bw * bh > 0.9 * w * h:
+            return None
+        return (l + bl, t + bt, bw, bh)
+
+    def _show_preview(self, snapped: Tuple[int, int, int, int]) -> None:
+        self._snapped = snapped
+        l, t, w, h = snapped
+        # Raise opacity so the preview is actually visible
+        try:
+            self.sel_win.attributes("-alpha", 0.45)
+        except Exception:
+            pass
+        self._preview = [
+            self.canvas.create_rectangle(l, t, l + w, t + h, outline="#ffd860", width=2, dash=(6, 4)),
+            self.canvas.create_text(
+                l, max(12, t - 14), anchor="w", fill="#ffd860", font=("Segoe UI", 10, "bold"),
+                text="Enter: snap to text   Space: keep selection   Esc: cancel",
+            ),
+        ]
+
+    def _clear_preview(self) -> None:
+        for item in self._preview:
+            self.canvas.delete(item)
+        self._preview = []
+        self._snapped = None
+        self._drag = None
+        try:
+            self.sel_win.attributes("-alpha", 0.02)
+        except Exception:
+            pass
+
+    def _on_accept_snap(self, _e):
+        if self._snapped:
+            self._result = self._snapped
+            self._close()
+
+    def _on_keep_drag(self, _e):
+        if self._drag:
+            self._result = self._drag
+            self._close()
+
     def _on_escape(self, _e):
         self._cancel()
 
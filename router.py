@@ -0,0 +1,157 @@
+# router.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+# First matching row wins; an empty "when" matches everything.
+# Reasoning tokens count against max_tokens, so every tier leaves room for them
+DEFAULT_ROUTE_TABLE: List[dict] = [
+    {"tier": "trivial", "when": {"max_chars": 160, "math": False, "max_options": 0},
+     "model": "gpt-5-nano", "reasoning_effort": "minimal", "max_tokens": 512},
+    {"tier": "choice", "when": {"max_chars": 700, "math": False, "min_options": 2},
+     "model": "gpt-5-mini", "reasoning_effort": "low", "max_tokens": 1536},
+    {"tier": "math", "when": {"max_chars": 400, "math": True},
+     "model": "gpt-5-mini", "reasoning_effort": "medium", "max_tokens": 2048},
+    {"tier": "hard", "when": {},
+     "model": "gpt-5", "reasoning_effort": "medium", "max_tokens": 4096},
+]
+
+# USD per 1M tokens: [input, output]
+DEFAULT_ROUTE_PRICES: Dict[str, List[float]] = {
+    "gpt-5": [1.25, 10.0],
+    "gpt-5-mini": [0.25, 2.0],
+    "gpt-5-nano": [0.05, 0.40],
+}
+
+_OPTION_RE = re.compile(r"^\s*\(?([A-Ha-h]|[1-8])[\).:]\s+\S", re.MULTILINE)
+_MATH_RE = re.compile(
+    r"\d\s*[-+*/^×÷=<>]\s*\d|[√∫∑π≤≥]|\b(?:solve|simplify|derivative|integral|equation|"
+    r"factor|evaluate|probability|sqrt|log|sin|cos|tan)\b",
+    re.IGNORECASE,
+)
+
+
+def features(text: str) -> dict:
+    return {
+        "chars": len(text.strip()),
+        "math": bool(_MATH_RE.search(text)),
+        "options": len(_OPTION_RE.findall(text)),
+    }
+
+
+def _matches(when: dict, f: dict) -> bool:
+    if "max_chars" in when and f["chars"] > when["max_chars"]:
+        return False
+    if "min_chars" in when and f["chars"] < when["min_chars"]:
+        return False
+    if "math" in when and f["math"] != bool(when["math"]):
+        return False
+    if "min_options" in when and f["options"] < when["min_options"]:
+        return False
+    if "max_options" in when and f["options"] > when["max_options"]:
+        return False
+    return True
+
+
+@dataclass
+class Route:
+    tier: str
+    model: str
+    reasoning_effort: Optional[str]
+    max_tokens: int
+    features: dict = field(default_factory=dict)
+
+
+class Router:
+    """
+    Picks model, reasoning effort and token budget per question from a table,
+    and keeps per-tier latency/cost stats (persisted to `stats_path`) so the
+    table can be tuned from real traffic.
+    """
+    def __init__(self, table: Optional[List[dict]] = None, prices: Optional[Dict[str, List[float]]] = None,
+                 stats_path: Optional[str] = "route_stats.json", default_model: str = "gpt-5",
+                 default_max_tokens: int = 256):
+        self.table = table or DEFAULT_ROUTE_TABLE
+        self.prices = prices or DEFAULT_ROUTE_PRICES
+        self.stats_path = stats_path
+        self.default_model = default_model
+        self.default_max_tokens = default_max_tokens
+        self._lock = threading.Lock()
+        self.stats: Dict[str, dict] = self._load_stats()
+
+    def route(self, text: str) -> Route:
+        f = features(text)
+        for row in self.table:
+            if _matches(row.get("when") or {}, f):
+                return Route(
+                    tier=str(row.get("tier") or row.get("model") or "default"),
+                    model=str(row.get("model") or self.default_model),
+                    reasoning_effort=row.get("reasoning_effort"),
+                    max_tokens=int(row.get("max_tokens") or self.default_max_tokens),
+                    features=f,
+                )
+        return Route("default", self.default_model, None, self.default_max_tokens, f)
+
+    def cost(self, model: str, usage: Optional[dict]) -> Optional[float]:
+        price = self.prices.get(model)
+        if not price or not usage:
+            return None
+        return (usage.get("prompt_tokens", 0) * price[0] + usage.get("completion_tokens", 0) * price[1]) / 1e6
+
+    def record(self, route: Route, model: str, latency_ms: float, usage: Optional[dict]) -> Optional[float]:
+        cost = self.cost(model, usage)
+        with self._lock:
+            s = self.stats.setdefault(route.tier, {
+                "count": 0, "latency_ms_sum": 0.0, "recent_ms": [],
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            })
+            s["count"] += 1
+            s["latency_ms_sum"] += latency_ms
+            s["recent_ms"] = (s["recent_ms"] + [round(latency_ms, 1)])[-200:]
+            if usage:
+                s["prompt_tokens"] += int(usage.get("prompt_tokens") or 0)
+                s["completion_tokens"] += int(usage.get("completion_tokens") or 0)
+            if cost is not None:
+                s["cost_usd"] += cost
+            self._save_stats()
+        log.info("Route %s (%s): %.0f ms, %s", route.tier, model, latency_ms,
+                 "cost ?" if cost is None else f"${cost:.5f}")
+        return cost
+
+    def summary(self) -> str:
+        lines = []
+        with self._lock:
+            for tier, s in sorted(self.stats.items()):
+                recent = sorted(s["recent_ms"]) or [0.0]
+                p50 = recent[len(recent) // 2]
+                p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+                lines.append(f"{tier}: n={s['count']} p50={p50:.0f} ms p95={p95:.0f} ms "
+                             f"cost=${s['cost_usd']:.4f} (${s['cost_usd'] / max(1, s['count']):.5f}/q)")
+        return "\n".join(lines)
+
+    def _load_stats(self) -> Dict[str, dict]:
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning("Ignoring unreadable route stats: %s", e)
+            return {}
+
+    def _save_stats(self) -> None:
+        if not self.stats_path:
+            return
+        try:
+            with open(self.stats_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, indent=2)
+        except Exception as e:
+            log.warning("Could not save route stats: %s", e)
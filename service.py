@@ -0,0 +1,235 @@
+# service.py
+from __future__ import annotations
+
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+from PIL import Image, UnidentifiedImageError
+
+from core import App, Config
+from metrics import REGISTRY, gauge, histogram
+from ocr import preload_reader, reader_loaded, run_ocr_batch
+
+log = logging.getLogger(__name__)
+
+MAX_BODY = 32 * 1024 * 1024
+
+_M_LATENCY = histogram("examgpt_service_ms", "Local service latency by endpoint stage", ("stage",))
+_M_BATCH = histogram("examgpt_service_batch_size", "Frames per recognizer call",
+                     bounds=(1, 2, 3, 4, 6, 8, 12, 16, 32))
+
+
+class MicroBatcher:
+    """
+    Collects submitted items for up to `window_s` (or `max_batch` items) after the
+    first one arrives and hands them to `run_batch` in one call.
+    """
+    def __init__(self, run_batch: Callable[[List], List], window_s: float = 0.02, max_batch: int = 8):
+        self._run = run_batch
+        self.window_s = window_s
+        self.max_batch = max(1, max_batch)
+        self._q: "queue.Queue" = queue.Queue()
+        self.batch_sizes = _M_BATCH.labels()
+        self._thread = threading.Thread(target=self._loop, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        return self._q.qsize()
+
+    def submit(self, item) -> Future:
+        fut: Future = Future()
+        self._q.put((item, fut))
+        return fut
+
+    def close(self) -> None:
+        self._q.put(None)
+
+    def _loop(self) -> None:
+        stop = False
+        while not stop:
+            first = self._q.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            self.batch_sizes.observe(len(batch))
+            try:
+                results = self._run([item for item, _ in batch])
+                for (_, fut), r in zip(batch, results):
+                    fut.set_result(r)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+
+
+class OcrService:
+    """One warm reader and one API client shared by every local caller."""
+    def __init__(self, cfg: Config, window_ms: int = 20, max_batch: int = 8):
+        self.app = App(cfg)
+        self.batcher = MicroBatcher(self._ocr_batch, window_ms / 1000.0, max_batch)
+        self.latency = {k: _M_LATENCY.labels(k) for k in ("ocr", "ask", "recognize")}
+        self.started = time.time()
+        gauge("examgpt_service_queue_depth", "Frames waiting for the batcher", fn=lambda: self.batcher.depth)
+
+    def warm(self) -> None:
+        preload_reader(self.app.cfg.ocr_lang)
+
+    def _ocr_batch(self, imgs: List[Image.Image]) -> List[str]:
+        t0 = time.perf_counter()
+        kw = self.app.ocr_kwargs()
+        out = run_ocr_batch(imgs, **kw)
+        self.latency["recognize"].observe((time.perf_counter() - t0) * 1000)
+        return out
+
+    def ocr(self, img: Image.Image) -> str:
+        t0 = time.perf_counter()
+        text = self.batcher.submit(img).result()
+        self.latency["ocr"].observe((time.perf_counter() - t0) * 1000)
+        return text
+
+    def ask(self, text: str) -> str:
+        t0 = time.perf_counter()
+        hit = self.app.lookup_answer(text)
+        if hit is not None:
+            self.latency["ask"].observe((time.perf_counter() - t0) * 1000)
+            return hit.answer
+        self.app.ensure_client()
+        answer = self.app.client.ask(self.app.cfg.system_prompt, text).strip()
+        self.latency["ask"].observe((time.perf_counter() - t0) * 1000)
+        self.app.remember_answer(text, answer)
+        return answer
+
+    def stats(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "reader_loaded": reader_loaded(),
+            "queue_depth": self.batcher.depth,
+            "batch_size": self.batcher.batch_sizes.snapshot(),
+            "latency_ms": {k: h.snapshot() for k, h in self.latency.items()},
+        }
+
+    def close(self) -> None:
+        self.batcher.close()
+        self.app.shutdown()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def log_message(self, fmt, *args):
+        log.debug("%s - " + fmt, self.address_string(), *args)
+
+    def _send(self, code: int, obj: dict) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        if n <= 0 or n > MAX_BODY:
+            raise ValueError(f"body must be 1..{MAX_BODY} bytes")
+        return self.rfile.read(n)
+
+    @staticmethod
+    def _image(body: bytes) -> Image.Image:
+        try:
+            img = Image.open(io.BytesIO(body))
+            img.load()
+        except (UnidentifiedImageError, OSError) as e:
+            raise ValueError(f"body is not a readable image: {e}") from e
+        return img
+
+    def do_GET(self):
+        svc = self.server.service
+        if self.path == "/health":
+            self._send(200, {"ok": True, "reader_loaded": reader_loaded()})
+        elif self.path == "/stats":
+            self._send(200, svc.stats())
+        elif self.path == "/metrics":
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        svc = self.server.service
+        t0 = time.perf_counter()
+        try:
+            body = self._body()
+            ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+            if self.path == "/ocr":
+                text = svc.ocr(self._image(body))
+                self._send(200, {"text": text, "ms": round((time.perf_counter() - t0) * 1000, 1)})
+            elif self.path == "/ask":
+                # JSON {"text": ...} skips OCR; anything else is treated as an image
+                if ctype == "application/json":
+                    text = str(json.loads(body).get("text") or "").strip()
+                else:
+                    text = svc.ocr(self._image(body)).strip()
+                answer = svc.ask(text) if text else ""
+                self._send(200, {"text": text, "answer": answer,
+                                 "ms": round((time.perf_counter() - t0) * 1000, 1)})
+            else:
+                self._send(404, {"error": "not found"})
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            log.exception("Request failed")
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, service: OcrService):
+        super().__init__(addr, _Handler)
+        self.service = service
+
+
+def make_server(cfg: Config, host: str = "127.0.0.1", port: int = 8765) -> _Server:
+    """Build (but don't start) the service. Port 0 picks a free port."""
+    svc = OcrService(cfg, cfg.service_batch_window_ms, cfg.service_max_batch)
+    return _Server((host, port), svc)
+
+
+def serve(cfg: Config, host: str = "127.0.0.1", port: Optional[int] = None) -> None:
+    srv = make_server(cfg, host, cfg.service_port if port is None else port)
+    srv.service.warm()
+    srv.service.app.start_metrics()
+    log.info("OCR service listening on http://%s:%d (POST /ocr, POST /ask, GET /stats, GET /metrics)",
+             *srv.server_address[:2])
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        srv.service.close()
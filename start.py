@@ -1,18 +1,54 @@
 # start.py
 from __future__ import annotations
 
+import time
+_T0 = time.perf_counter()  # before any heavy import, for --profile
+
+import argparse
 import os
 import logging
 
-from core import App, load_config_from_disk, save_config_to_disk
-from gui import gui_main
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen OCR Box → ChatGPT")
+    parser.add_argument("--profile", action="store_true",
+                        help="record import times and time to first paint (appends to startup_profile.jsonl)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the headless local OCR/answer service instead of the GUI")
+    parser.add_argument("--host", default="127.0.0.1", help="service bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=None, help="service port (default: config service_port)")
+    parser.add_argument("--autotune", metavar="SAMPLES_DIR",
+                        help="tune OCR preprocessing on images with matching .txt ground truth, then exit")
+    parser.add_argument("--jobs", type=int, default=None, help="processes for --autotune (default: cores, at most 4)")
+    args = parser.parse_args(argv)
 
-def main():
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s | %(levelname)s | %(message)s",
     )
+
+    profiler = None
+    if args.profile:
+        from startup_profile import StartupProfiler
+        profiler = StartupProfiler(_T0)
+        profiler.install_import_hook()
+
+    # Headless modes never import the GUI (or tkinter)
+    if args.autotune:
+        from autotune import autotune_main
+        return autotune_main(args.autotune, args.jobs)
+
+    if args.serve:
+        from core import load_config_from_disk
+        from service import serve
+        serve(load_config_from_disk(), args.host, args.port)
+        return
+
+    from core import App, load_config_from_disk, save_config_to_disk
+    from gui import gui_main
+    if profiler:
+        profiler.mark("imports")
+
     logging.info("Bootstrapping Screen OCR Box → ChatGPT…")
     workdir = os.getcwd()
     logging.info("Working dir: %s", workdir)
@@ -23,16 +59,24 @@ def main():
 
     # Build the app (client will be created on-demand by GUI via app.ensure_client())
     app = App(cfg, client=None)
+    if profiler:
+        profiler.mark("config")
+
+    def _first_paint():
+        if profiler:
+            profiler.mark("first_paint")
+            profiler.report()
 
     try:
-        gui_main(app, cfg, log_path=os.path.join(workdir, "app.log"))
+        gui_main(app, cfg, log_path=os.path.join(workdir, "app.log"), on_first_paint=_first_paint)
     finally:
         # Persist any last config changes on close
         try:
             save_config_to_disk(app.cfg)
         except Exception:
             pass
+        app.shutdown()
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+# startup_profile.py
+from __future__ import annotations
+
+import importlib._bootstrap as _bootstrap
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Records first-import times and named startup marks relative to `t0`
+    (a perf_counter taken as early as possible in start.py). Every import is
+    timed at every depth, like `python -X importtime`: `imports` holds each
+    module's own (exclusive) time, `cumulative` includes what it imported.
+    """
+    def __init__(self, t0: float):
+        self.t0 = t0
+        self.imports: Dict[str, float] = {}     # module -> exclusive seconds
+        self.cumulative: Dict[str, float] = {}  # module -> inclusive seconds
+        self.top_level: List[str] = []          # modules imported at depth 0, in order
+        self.marks: List[Tuple[str, float]] = []
+        self._local = threading.local()         # per-thread stack of child time
+        self._orig_import = None
+
+    # ---------- imports ----------
+    def install_import_hook(self) -> None:
+        if self._orig_import is not None:
+            return
+        # The loader every import goes through, including submodules pulled in
+        # by "from pkg import mod"; -X importtime instruments the same spot
+        orig = _bootstrap._find_and_load
+        self._orig_import = orig
+
+        def _timed_load(name, import_):
+            if name in sys.modules:
+                return orig(name, import_)
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)
+            t = time.perf_counter()
+            try:
+                return orig(name, import_)
+            finally:
+                total = time.perf_counter() - t
+                children = stack.pop()
+                if stack:
+                    stack[-1] += total
+                elif name not in self.cumulative:
+                    self.top_level.append(name)
+                self.imports[name] = self.imports.get(name, 0.0) + total - children
+                self.cumulative[name] = self.cumulative.get(name, 0.0) + total
+
+        _bootstrap._find_and_load = _timed_load
+
+    def remove_import_hook(self) -> None:
+        if self._orig_import is not None:
+            _bootstrap._find_and_load = self._orig_import
+            self._orig_import = None
+
+    # ---------- marks ----------
+    def mark(self, name: str) -> float:
+        ms = (time.perf_counter() - self.t0) * 1000
+        self.marks.append((name, ms))
+        return ms
+
+    def mark_ms(self, name: str) -> Optional[float]:
+        for n, ms in self.marks:
+            if n == name:
+                return ms
+        return None
+
+    # ---------- report ----------
+    def report(self, history_path: str = "startup_profile.jsonl", top: int = 15) -> dict:
+        """Log the profile and append it to `history_path` so first paint can be tracked."""
+        self.remove_import_hook()
+        slow = sorted(self.imports.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        top_level = sorted(((n, self.cumulative[n]) for n in self.top_level),
+                           key=lambda kv: kv[1], reverse=True)[:top]
+        first_paint = self.mark_ms("first_paint")
+
+        log.info("Startup profile:")
+        for name, ms in self.marks:
+            log.info("  %-22s %8.1f ms", name, ms)
+        log.info("Slowest top-level imports (cumulative):")
+        for name, sec in top_level:
+            log.info("  %-22s %8.1f ms", name, sec * 1000)
+        log.info("Slowest modules (self time, any depth):")
+        for name, sec in slow:
+            log.info("  %-32s %8.1f ms  (cumulative %.1f ms)", name, sec * 1000, self.cumulative[name] * 1000)
+
+        entry = {
+            "ts": time.time(),
+            "first_paint_ms": None if first_paint is None else round(first_paint, 1),
+            "marks": {n: round(ms, 1) for n, ms in self.marks},
+            "imports_ms": {n: round(sec * 1000, 1) for n, sec in top_level},
+            "imports_self_ms": {n: round(sec * 1000, 1) for n, sec in slow},
+        }
+
+        previous = _previous_first_paints(history_path)
+        if first_paint is not None and previous:
+            base = statistics.median(previous[-10:])
+            delta = (first_paint - base) / base * 100 if base else 0.0
+            entry["baseline_first_paint_ms"] = round(base, 1)
+            if delta > 20:
+                log.warning("Time to first paint %.0f ms is %.0f%% slower than the recent median (%.0f ms)",
+                            first_paint, delta, base)
+            else:
+                log.info("Time to first paint %.0f ms (recent median %.0f ms, %+.0f%%)",
+                         first_paint, base, delta)
+
+        try:
+            with open(history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            log.warning("Could not write startup profile: %s", e)
+        return entry
+
+
+def _previous_first_paints(path: str) -> List[float]:
+    if not os.path.exists(path):
+        return []
+    out: List[float] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    v = json.loads(line).get("first_paint_ms")
+                except Exception:
+                    continue
+                if isinstance(v, (int, float)):
+                    out.append(float(v))
+    except Exception:
+        pass
+    return out
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other by bare name (`from core import ...`), as start.py runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,8 @@
+import autotune
+
+
+def test_default_jobs_is_capped(monkeypatch):
+    monkeypatch.setattr(autotune.os, "cpu_count", lambda: 64)
+    assert autotune.default_jobs() == autotune.MAX_DEFAULT_JOBS
+    monkeypatch.setattr(autotune.os, "cpu_count", lambda: None)
+    assert autotune.default_jobs() == 1
@@ -0,0 +1,29 @@
+from core import App, Config
+from deadline import Deadline
+from mini_math import FINAL_ANSWER_INSTRUCTION
+
+
+class _RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def ask(self, system, user, max_tokens=None, stop_pattern=None, **kwargs):
+        self.calls.append((system, stop_pattern))
+        return "B"
+
+
+def _ask(cfg):
+    client = _RecordingClient()
+    app = App(cfg, client=client)
+    assert app._ask_within("Which one?", Deadline(None), {}, [], {}) == "B"
+    return client.calls[0]
+
+
+def test_early_stop_asks_for_a_labelled_answer():
+    system, stop = _ask(Config(stream_early_stop=True, system_prompt="Be brief."))
+    assert stop
+    assert system == "Be brief.\n\n" + FINAL_ANSWER_INSTRUCTION
+
+
+def test_prompt_is_unchanged_without_early_stop():
+    assert _ask(Config(system_prompt="Be brief.")) == ("Be brief.", None)
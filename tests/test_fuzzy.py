@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+import fuzzy
+from fuzzy import FuzzyIndex
+
+
+def _dp(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+@pytest.fixture
+def myers(monkeypatch):
+    # Exercise the pure-Python fallback even where rapidfuzz is installed
+    monkeypatch.setattr(fuzzy, "_rf_lev", None)
+
+
+def test_myers_matches_dp(myers):
+    rnd = random.Random(0)
+    for _ in range(3000):
+        a = "".join(rnd.choice("abc ") for _ in range(rnd.randint(0, 80)))
+        b = "".join(rnd.choice("abc ") for _ in range(rnd.randint(0, 80)))
+        assert fuzzy.levenshtein(a, b) == _dp(a, b), (a, b)
+
+
+def test_myers_long_strings(myers):
+    rnd = random.Random(1)
+    a = "".join(rnd.choice("abcdefgh") for _ in range(300))
+    b = list(a)
+    for _ in range(12):
+        b[rnd.randrange(len(b))] = "z"
+    b = "".join(b)
+    assert fuzzy.levenshtein(a, b) == _dp(a, b)
+
+
+def test_myers_cutoff(myers):
+    rnd = random.Random(2)
+    for _ in range(3000):
+        a = "".join(rnd.choice("abc ") for _ in range(rnd.randint(0, 60)))
+        b = "".join(rnd.choice("abc ") for _ in range(rnd.randint(0, 60)))
+        k = rnd.randint(0, 20)
+        d, r = _dp(a, b), fuzzy.levenshtein(a, b, k)
+        if d <= k:
+            assert r == d, (a, b, k)
+        else:
+            assert r > k, (a, b, k)
+
+
+QUESTION = (
+    "Which of the following statements about photosynthesis is TRUE?\n"
+    "A) It only happens at night\nB) It releases carbon dioxide\n"
+    "C) It takes place in the mitochondria\nD) It converts light energy into chemical energy"
+)
+
+
+def _index(n=3000, seed=0):
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choice("bcdfghjkmpqrstvwxyz") for _ in range(rnd.randint(3, 8))) for _ in range(2000)]
+    idx = FuzzyIndex(threshold=0.9)
+    texts = [" ".join(rnd.choice(words) for _ in range(rnd.randint(10, 30))) + "?" for _ in range(n)]
+    idx.extend((t, f"ans{i}") for i, t in enumerate(texts))
+    return idx, texts
+
+
+def test_finds_noisy_repeat_in_sorted_index():
+    idx, texts = _index()
+    rnd = random.Random(3)
+    found = 0
+    for i in rnd.sample(range(len(texts)), 200):
+        t = list(texts[i])
+        t[rnd.randrange(len(t))] = "a"   # not in the word alphabet
+        m = idx.lookup("".join(t).replace(" ", "\n", 1))
+        if m is not None:
+            assert m.answer == f"ans{i}"
+            assert 0.9 <= m.score < 1.0
+            found += 1
+    assert found >= 195
+
+
+def test_finds_recent_entries_in_unsorted_tail():
+    idx, _ = _index(n=2000)
+    idx.add(QUESTION, "D")
+    assert idx._indexed < len(idx)   # still in the tail
+    m = idx.lookup(QUESTION.replace("photosynthesis", "photosynthesls"))
+    assert m is not None and m.answer == "D"
+
+
+def test_unrelated_text_misses():
+    idx, _ = _index()
+    assert idx.lookup("what is the boiling point of water at sea level") is None
+
+
+def test_exact_repeat_scores_one_and_confusables_fold():
+    idx = FuzzyIndex()
+    idx.add("Solve for x: 2x + 3 = 11", "4")
+    m = idx.lookup("solve   for x:\n2x + 3 = 11")
+    assert m is not None and m.score == 1.0
+    assert idx.lookup("SoIve for x: 2x + 3 = 11") is not None   # I read for l
+
+
+def test_numbers_must_match():
+    idx = FuzzyIndex(threshold=0.8)
+    idx.add("What is 12*3?", "36")
+    assert idx.lookup("What is 12*4?") is None
+    assert idx.lookup("What is 12*3 ?") is not None
+
+
+@pytest.mark.parametrize("variant", [
+    QUESTION.replace("TRUE", "FALSE"),
+    QUESTION.replace("is TRUE", "is NOT TRUE"),
+    QUESTION.replace("is TRUE", "isn't TRUE"),
+    QUESTION.replace("Which of the following", "All of the following EXCEPT which"),
+])
+def test_polarity_change_is_a_miss(variant):
+    idx = FuzzyIndex(threshold=0.9)
+    idx.add(QUESTION, "D")
+    assert idx.lookup(variant) is None
+
+
+def test_polarity_guard_can_be_disabled():
+    idx = FuzzyIndex(threshold=0.9, polarity_must_match=False)
+    idx.add(QUESTION, "D")
+    assert idx.lookup(QUESTION.replace("TRUE", "FALSE")) is not None
+
+
+def test_repeat_replaces_answer():
+    idx = FuzzyIndex()
+    idx.add("capital of France?", "Lyon")
+    idx.add("Capital of  France?", "Paris")
+    assert len(idx) == 1
+    assert idx.lookup("capital of France?").answer == "Paris"
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from history import RunHistory
+
+
+@pytest.fixture
+def hist(tmp_path):
+    h = RunHistory(str(tmp_path / "history.sqlite3"), retention_days=0, max_rows=0)
+    yield h
+    h.close()
+
+
+def _add(h, n, **kw):
+    return [h.append(region=None, settings=kw.pop("settings", {}), ocr_text=f"q{i}",
+                     answer=f"a{i}", **kw) for i in range(n)]
+
+
+def test_page_walks_newest_first_by_id(hist):
+    ids = _add(hist, 7)
+    first = hist.page(limit=3)
+    assert [r["id"] for r in first] == ids[:-4:-1]
+    second = hist.page(before_id=first[-1]["id"], limit=3)
+    assert [r["id"] for r in second] == ids[3:0:-1]
+    last = hist.page(before_id=second[-1]["id"], limit=3)
+    assert [r["id"] for r in last] == ids[:1]
+    assert hist.page(before_id=ids[0]) == []
+
+
+def test_page_carries_summaries_only(hist):
+    hist.append(region=(0, 0, 1, 1), settings={}, ocr_text="x" * 500, answer="y" * 200)
+    row = hist.page()[0]
+    assert len(row["ocr_head"]) == 160 and len(row["answer_head"]) == 80
+    assert "ocr_text" not in row.keys()
+
+
+def test_compact_keeps_the_newest_max_rows(hist):
+    ids = _add(hist, 10)
+    hist.max_rows = 4
+    assert hist.compact() == 6
+    assert [r["id"] for r in hist.page()] == ids[:-5:-1]
+    assert hist.compact() == 0
+
+
+def test_compact_drops_rows_past_retention(hist):
+    now = time.time()
+    old = hist.append(region=None, settings={}, ocr_text="old", ts=now - 3 * 86400)
+    new = hist.append(region=None, settings={}, ocr_text="new", ts=now - 3600)
+    hist.retention_days = 2
+    assert hist.compact() == 1
+    assert hist.get(old) is None and hist.get(new)["ocr_text"] == "new"
+
+
+def test_compaction_runs_on_open_and_every_n_appends(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    h = RunHistory(path, retention_days=0, max_rows=3, compact_every=5)
+    _add(h, 4)
+    assert h.count() == 4
+    _add(h, 1)  # fifth append compacts
+    assert h.count() == 3
+    _add(h, 2)
+    h.close()
+    h = RunHistory(path, retention_days=0, max_rows=3)
+    try:
+        assert h.count() == 3
+    finally:
+        h.close()
+
+
+def test_iter_answered_skips_cache_hits_degraded_and_unanswered(hist):
+    hist.append(region=None, settings={}, ocr_text="fresh", answer="1")
+    hist.append(region=None, settings={"result": "exact"}, ocr_text="exact", answer="2")
+    hist.append(region=None, settings={}, ocr_text="hit", answer="3", cache="exact")
+    hist.append(region=None, settings={"result": "degraded: OCR timed out"}, ocr_text="cut", answer="4")
+    hist.append(region=None, settings={}, ocr_text="blank", answer="")
+    assert list(hist.iter_answered(chunk=1)) == [("fresh", "1"), ("exact", "2")]
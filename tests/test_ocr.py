@@ -0,0 +1,92 @@
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import ocr
+
+
+def test_ladder_starts_from_the_configured_path():
+    assert ocr._rungs(False, True, True) == (("fixed", True, True, 1.0),)
+    rungs = ocr._rungs(True, True, True)
+    assert rungs[0] == ("fixed", True, True, 1.0)
+    # The adaptive rung would repeat the fixed path
+    assert [r[0] for r in rungs[1:]] == ["raw", "blur", "upscaled"]
+    assert [r[0] for r in ocr._rungs(True, False, False)[1:]] == ["blur", "adaptive", "upscaled"]
+
+
+def _text_like(cap, lines=3, glyphs=30):
+    # Alternating x-height and cap-height "letters", like lowercase text with ascenders
+    xh = max(3, int(cap * 0.7))
+    w = max(2, cap // 2)
+    arr = np.full((lines * cap * 2 + 20, glyphs * w * 2 + 20), 255, dtype=np.uint8)
+    for ln in range(lines):
+        base = 10 + ln * cap * 2 + cap
+        for g in range(glyphs):
+            h = cap if g % 3 == 0 else xh
+            x = 10 + g * w * 2
+            arr[base - h:base, x:x + w] = 0
+    return arr
+
+
+@pytest.mark.parametrize("cap", [8, 11, 14, 21, 29])
+def test_normal_text_is_not_resampled(cap):
+    arr = _text_like(cap)
+    out, f, ch = ocr._normalize_scale(arr, 32)
+    assert ch == pytest.approx(cap, abs=1)
+    assert f == 1.0 and out is arr
+
+
+@pytest.mark.parametrize("lines", [1, 3])
+def test_large_text_is_shrunk_to_the_target_cap_height(lines):
+    out, f, _ = ocr._normalize_scale(_text_like(64, lines=lines), 32)
+    assert f == pytest.approx(0.5, abs=0.02)
+    assert ocr._cap_height(out) == pytest.approx(32, abs=2)
+
+
+@pytest.mark.parametrize("cap", [48, 64, 96])
+def test_trimmed_single_line_is_still_scaled(cap, monkeypatch):
+    # Trim crops one line to about cap height + padding before the scale stage
+    text = _text_like(cap, lines=1, glyphs=8)
+    frame = np.full((text.shape[0] + 200, text.shape[1] + 200), 255, dtype=np.uint8)
+    frame[100:100 + text.shape[0], 100:100 + text.shape[1]] = text
+    seen = []
+    real = ocr._normalize_scale
+    monkeypatch.setattr(ocr, "_normalize_scale", lambda arr, h: seen.append(real(arr, h)) or seen[-1])
+    out = ocr._base(Image.fromarray(frame))
+    _, f, ch = seen[0]
+    assert ch == pytest.approx(cap, abs=1)
+    assert f == pytest.approx(32 / cap, abs=0.02)
+    assert out.shape[0] < text.shape[0]
+
+
+def test_only_tiny_text_is_enlarged():
+    _, f, _ = ocr._normalize_scale(_text_like(5), 32)
+    assert f == pytest.approx(ocr._UPSCALE_CAP_PX / 5)
+
+
+def _box(x0, y0, x1, y1):
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def test_boxes_join_into_paragraphs_like_easyocr():
+    results = [
+        (_box(120, 10, 200, 30), "second", 0.9),
+        (_box(10, 12, 100, 30), "First", 0.9),
+        (_box(10, 36, 150, 56), "line two", 0.9),    # 6 px gap: same paragraph
+        (_box(10, 100, 80, 120), "A) yes", 0.9),     # 44 px gap: new paragraph
+        (_box(10, 140, 80, 160), "B) no", 0.9),
+    ]
+    assert ocr._boxes_to_text(results) == "First second line two\nA) yes\nB) no"
+
+
+def test_frame_is_cropped_before_it_is_scaled(monkeypatch):
+    seen = []
+    real = ocr._normalize_scale
+    monkeypatch.setattr(ocr, "_normalize_scale", lambda arr, h: seen.append(arr.shape) or real(arr, h))
+    frame = np.full((1000, 1200), 255, dtype=np.uint8)
+    text = _text_like(64, glyphs=10)
+    frame[:text.shape[0], :text.shape[1]] = text
+    out = ocr._base(Image.fromarray(frame))
+    assert seen[0][0] < text.shape[0] and seen[0][1] < text.shape[1]
+    assert out.shape[0] == pytest.approx(seen[0][0] / 2, abs=2)
@@ -0,0 +1,128 @@
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import ocr_worker
+from deadline import Deadline
+from ocr_worker import OcrWorkerPool
+
+
+def _fake_child(conn, delays):
+    # Speaks the worker protocol without importing OCR; `delays` slows chosen commands
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        seq, cmd = msg[0], msg[1]
+        if cmd == "stop":
+            return
+        time.sleep(delays.get(cmd, 0))
+        if cmd == "ocr":
+            conn.send((seq, "ok", f"frame {msg[3]}"))
+        elif cmd == "ping":
+            conn.send((seq, "pong", 0, False, 0))
+        else:
+            conn.send((seq, "ok", cmd))
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    delays = {}
+
+    def spawn(self):
+        parent, child = mp.Pipe()
+        self.proc = threading.Thread(target=_fake_child, args=(child, delays), daemon=True)
+        self.proc.start()
+        self.conn = parent
+
+    monkeypatch.setattr(ocr_worker._Worker, "_spawn", spawn)
+    return delays
+
+
+def test_reply_to_timed_out_command_is_not_returned_to_the_next_call(delays):
+    delays["preload"] = 0.3
+    pool = OcrWorkerPool(workers=1, timeout=5)
+    try:
+        assert pool._broadcast("preload", "eng", timeout=0.05) == [None]
+        assert pool.run_detailed(Image.new("L", (8, 4))) == "frame (4, 8)"
+        assert pool._broadcast("idle", 60, timeout=1) == ["idle"]
+    finally:
+        pool.close()
+
+
+def test_out_of_budget_frame_times_out_without_restarting_the_worker(delays):
+    delays["ocr"] = 1.5
+    pool = OcrWorkerPool(workers=1, timeout=30)
+    try:
+        t0 = time.monotonic()
+        with pytest.raises(TimeoutError):
+            pool.run_detailed(Image.new("L", (8, 4)), deadline=Deadline(0.1))
+        assert time.monotonic() - t0 < 1.4
+        delays["ocr"] = 0
+        assert pool.run_detailed(Image.new("L", (6, 2))) == "frame (2, 6)"
+        assert pool._workers[0].restarts == 0
+    finally:
+        pool.close()
+
+
+def test_maintenance_never_waits_on_a_busy_worker(delays):
+    delays["ocr"] = 1.0
+    pool = OcrWorkerPool(workers=1, timeout=30)
+    try:
+        t = threading.Thread(target=pool.run_detailed, args=(Image.new("L", (8, 4)),))
+        t.start()
+        time.sleep(0.2)  # frame in flight, worker lock held
+        t0 = time.monotonic()
+        idle = pool.release_if_idle(60)
+        pre = pool.preload("eng")
+        maint = pool.maintain(60)
+        assert pool._broadcast("idle", 60, timeout=5, block=False) == [None]
+        assert time.monotonic() - t0 < 0.1
+        # The background commands skip the busy worker rather than queue behind it
+        assert idle.result(0.5) == [None] and pre.result(0.5) == [None]
+        maint.result(0.5)
+        assert pool.health_check() == 0
+        t.join()
+        assert pool.release_if_idle(60).result(2) == ["idle"]
+        assert pool._workers[0].restarts == 0
+    finally:
+        pool.close()
+
+
+def test_expired_deadline_returns_degraded_without_sending_the_frame(delays):
+    delays["ocr"] = 1.0
+    pool = OcrWorkerPool(workers=1, timeout=30)
+    try:
+        dl = Deadline(0.01)
+        time.sleep(0.05)
+        t0 = time.monotonic()
+        res = pool.run_detailed(Image.new("L", (8, 4)), deadline=dl)
+        assert time.monotonic() - t0 < 0.5
+        assert res.degraded and res.text == ""
+    finally:
+        pool.close()
+
+
+def test_worker_answers_an_expired_budget_without_running_ocr(monkeypatch):
+    import ocr
+
+    def boom(*a, **kw):
+        raise AssertionError("OCR ran past its deadline")
+
+    monkeypatch.setattr(ocr, "run_ocr_detailed", boom)
+    monkeypatch.setattr("inference_threads.apply_threads", lambda *a: (0, 0))
+    parent, child = mp.Pipe()
+    t = threading.Thread(target=ocr_worker._worker_main, args=(child, 0, 0), daemon=True)
+    t.start()
+    try:
+        parent.send((1, "ocr", "unused", (4, 8), {}, 0.0))
+        assert parent.poll(5)
+        seq, status, res = parent.recv()
+        assert (seq, status) == (1, "ok") and res.degraded
+    finally:
+        parent.send((2, "stop"))
+        t.join(5)
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+import requests
+
+import openai_client
+from mini_math import DEFAULT_ANSWER_PATTERN, FinalAnswerWatcher
+from openai_client import ChatGPTClient
+
+
+class _Resp:
+    def __init__(self, status=200, body=None, lines=()):
+        self.status_code = status
+        self._body = body or {}
+        self._lines = lines
+
+    def json(self):
+        return self._body
+
+    @property
+    def text(self):
+        return json.dumps(self._body)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self._lines)
+
+    def close(self):
+        pass
+
+
+def _sse(*deltas):
+    return [f"data: {json.dumps({'choices': [{'delta': d}]})}" for d in deltas] + ["data: [DONE]"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    return ChatGPTClient(max_tokens=64)
+
+
+def _route(monkeypatch, stream_resp, once_body):
+    calls = []
+
+    def post(url, headers=None, data=None, timeout=None, stream=False):
+        calls.append("stream" if json.loads(data).get("stream") else "once")
+        return stream_resp if stream else _Resp(body=once_body)
+
+    monkeypatch.setattr(openai_client.requests, "post", post)
+    return calls
+
+
+def test_rejected_stream_falls_back_to_a_plain_request(client, monkeypatch):
+    once = {"choices": [{"message": {"content": "Options checked.\nFinal answer: B"}}]}
+    calls = _route(monkeypatch, _Resp(status=400, body={"error": "organization must be verified"}), once)
+    assert client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN) == "B"
+    assert client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN) == "B"
+    # The model is remembered; the second ask doesn't try to stream again
+    assert calls == ["stream", "once", "once"]
+
+
+def test_server_errors_are_not_retried_without_streaming(client, monkeypatch):
+    _route(monkeypatch, _Resp(status=503), {})
+    with pytest.raises(requests.HTTPError):
+        client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN)
+
+
+def test_streamed_refusal_is_returned(client, monkeypatch):
+    _route(monkeypatch, _Resp(lines=_sse({"refusal": "I can't "}, {"refusal": "help with that."})), {})
+    assert client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN) == "I can't help with that."
+
+
+def test_stream_stops_after_labelled_answer(client, monkeypatch):
+    lines = _sse({"content": "Work: 6*7\n"}, {"content": "Final answer: 42\n"}, {"content": "More text"})
+    _route(monkeypatch, _Resp(lines=lines), {})
+    assert client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN) == "42"
+    assert client.last_stats["early_stop"] is True
+
+
+@pytest.mark.parametrize("text", ["2\n3\n", "B\nC\n", "4", "Final answer: 4"])
+def test_watcher_needs_a_complete_labelled_answer(text):
+    w = FinalAnswerWatcher(DEFAULT_ANSWER_PATTERN)
+    w.feed(text)
+    assert not w.done
+
+
+def test_watcher_finds_labelled_answer_across_chunks():
+    w = FinalAnswerWatcher(DEFAULT_ANSWER_PATTERN)
+    for chunk in ("Final ans", "wer: ", "4", "2", "\n"):
+        w.feed(chunk)
+    assert w.done and w.answer == "42"
+
+
+def test_empty_reply_at_the_token_limit_is_retried_with_a_larger_budget(client, monkeypatch):
+    budgets = []
+    replies = [{"choices": [{"message": {"content": ""}, "finish_reason": "length"}]},
+               {"choices": [{"message": {"content": "C"}, "finish_reason": "stop"}]}]
+
+    def post(url, headers=None, data=None, timeout=None, stream=False):
+        budgets.append(json.loads(data)["max_completion_tokens"])
+        return _Resp(body=replies[len(budgets) - 1])
+
+    monkeypatch.setattr(openai_client.requests, "post", post)
+    assert client.ask("sys", "q", max_tokens=256, model="gpt-5-mini", reasoning_effort="low") == "C"
+    assert budgets == [256, 1024]
+
+
+def test_unterminated_label_at_the_end_of_the_stream_is_parsed(client, monkeypatch):
+    _route(monkeypatch, _Resp(lines=_sse({"content": "Because 2+2=4.\nFinal answer: "}, {"content": "4"})), {})
+    assert client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN) == "4"
+    assert client.last_stats["early_stop"] is False
+
+
+def test_unlabelled_stream_is_returned_whole(client, monkeypatch):
+    _route(monkeypatch, _Resp(lines=_sse({"content": "Mitochondria"})), {})
+    assert client.ask("sys", "q", stop_pattern=DEFAULT_ANSWER_PATTERN) == "Mitochondria"
@@ -0,0 +1,121 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from PIL import Image
+
+import service
+from core import Config
+from service import MicroBatcher, make_server
+
+
+def _png(w, h):
+    buf = io.BytesIO()
+    Image.new("L", (w, h), 255).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class _FakeClient:
+    def ask(self, system, user, *args, **kwargs):
+        return f"answer to {user}"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    calls = []
+
+    def fake_batch(imgs, **kw):
+        calls.append(len(imgs))
+        return ["%dx%d" % im.size for im in imgs]
+
+    monkeypatch.setattr(service, "run_ocr_batch", fake_batch)
+    srv = make_server(Config(service_batch_window_ms=50), port=0)
+    srv.service.app.client = _FakeClient()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = "http://%s:%d" % srv.server_address[:2]
+    yield base, calls
+    srv.shutdown()
+    srv.server_close()
+    srv.service.close()
+
+
+def _post(url, body, ctype="image/png"):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": ctype}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_ocr_endpoint(server):
+    base, _ = server
+    code, out = _post(base + "/ocr", _png(30, 20))
+    assert code == 200 and out["text"] == "30x20"
+
+
+def test_concurrent_frames_share_one_recognizer_call(server):
+    base, calls = server
+    results = [None] * 4
+
+    def post(i):
+        results[i] = _post(base + "/ocr", _png(10 + i, 10))
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [r[1]["text"] for r in results] == ["10x10", "11x10", "12x10", "13x10"]
+    assert sum(calls) == 4 and len(calls) < 4
+
+
+def test_ask_with_json_text_skips_ocr(server):
+    base, calls = server
+    code, out = _post(base + "/ask", json.dumps({"text": "2+2"}).encode(), "application/json")
+    assert code == 200 and out["answer"] == "answer to 2+2"
+    assert calls == []
+
+
+@pytest.mark.parametrize("path", ["/ocr", "/ask"])
+def test_non_image_body_is_a_client_error(server, path):
+    base, _ = server
+    code, out = _post(base + path, b"definitely not a png")
+    assert code == 400 and "image" in out["error"]
+
+
+def test_health_and_stats(server):
+    base, _ = server
+    with urllib.request.urlopen(base + "/health", timeout=10) as r:
+        assert json.loads(r.read())["ok"] is True
+    with urllib.request.urlopen(base + "/stats", timeout=10) as r:
+        assert "queue_depth" in json.loads(r.read())
+
+
+def test_batcher_groups_items_within_the_window():
+    seen = []
+    b = MicroBatcher(lambda items: seen.append(list(items)) or [i * 2 for i in items],
+                     window_s=0.2, max_batch=3)
+    try:
+        futs = [b.submit(i) for i in range(5)]
+        assert [f.result(5) for f in futs] == [0, 2, 4, 6, 8]
+        assert seen == [[0, 1, 2], [3, 4]]
+    finally:
+        b.close()
+
+
+def test_batcher_fails_every_future_in_a_failed_batch():
+    def boom(items):
+        raise RuntimeError("reader crashed")
+
+    b = MicroBatcher(boom, window_s=0.05)
+    try:
+        futs = [b.submit(i) for i in range(2)]
+        for f in futs:
+            with pytest.raises(RuntimeError, match="reader crashed"):
+                f.result(5)
+    finally:
+        b.close()
@@ -0,0 +1,40 @@
+import sys
+import time
+
+import pytest
+
+from startup_profile import StartupProfiler
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    pkg = tmp_path / "sp_pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("import time\ntime.sleep(0.02)\nfrom . import heavy\n")
+    (pkg / "heavy.py").write_text("import time\ntime.sleep(0.06)\nimport sp_leaf\n")
+    (tmp_path / "sp_leaf.py").write_text("import time\ntime.sleep(0.04)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield
+    for name in ("sp_pkg", "sp_pkg.heavy", "sp_leaf"):
+        sys.modules.pop(name, None)
+
+
+def test_every_depth_gets_its_own_time(modules, tmp_path):
+    prof = StartupProfiler(time.perf_counter())
+    prof.install_import_hook()
+    try:
+        import sp_pkg  # noqa: F401
+    finally:
+        prof.remove_import_hook()
+
+    own = {k: v for k, v in prof.imports.items() if k.startswith("sp_")}
+    assert set(own) == {"sp_pkg", "sp_pkg.heavy", "sp_leaf"}
+    assert 0.02 <= own["sp_pkg"] < 0.05
+    assert 0.06 <= own["sp_pkg.heavy"] < 0.09
+    assert 0.04 <= own["sp_leaf"] < 0.07
+    assert prof.cumulative["sp_pkg"] >= 0.12
+    assert prof.top_level == ["sp_pkg"]
+
+    entry = prof.report(history_path=str(tmp_path / "profile.jsonl"))
+    assert "sp_pkg.heavy" in entry["imports_self_ms"]
+    assert list(entry["imports_ms"]) == ["sp_pkg"]